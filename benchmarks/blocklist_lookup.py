@@ -0,0 +1,98 @@
+"""
+Latencia de la revisión de tokens revocados (RevokedTokenCache.is_revoked) según cuántos
+logouts vencidos hay en token_blocked_list. Para cada tamaño carga esas filas vencidas más
+--live bloqueos vigentes, mide p50/p99 de tres casos (token sin bloquear, bloqueado vigente y
+bloqueado vencido), más la consulta de confirmación a la BD que hace el cache cuando el bloom
+dice "tal vez" (db), y vuelve a medir después de purge_expired_tokens.
+
+    python benchmarks/blocklist_lookup.py --rows 0 100000 1000000
+
+Usa una BD SQLite temporal que se recrea en cada tamaño (DB_CONNECTION_STRING la reemplaza, p.ej. Postgres).
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(lookup, tokens, lookups):
+    latencies = []
+    for i in range(lookups):
+        token = tokens[i % len(tokens)]
+        start = time.perf_counter()
+        lookup(token)
+        latencies.append(time.perf_counter() - start)
+    return percentile(latencies, 0.50) * 1e6, percentile(latencies, 0.99) * 1e6
+
+
+def insert(db, TokenBlockedList, tokens, created_at, expires_at, batch_size=10000):
+    table = TokenBlockedList.__table__
+    for start in range(0, len(tokens), batch_size):
+        db.session.execute(table.insert(), [{"token": token, "created_at": created_at, "expires_at": expires_at} for token in tokens[start:start + batch_size]])
+        db.session.commit()
+
+
+def run(rows, args):
+    from main import app, db, TokenBlockedList
+    from blocklist import RevokedTokenCache, purge_expired_tokens, live_tokens
+
+    now = datetime.utcnow()
+    expired = [uuid.uuid4().hex for _ in range(rows)]
+    live = [uuid.uuid4().hex for _ in range(args.live)]
+    unknown = [uuid.uuid4().hex for _ in range(1000)]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        insert(db, TokenBlockedList, expired, now - timedelta(hours=2), now - timedelta(hours=1))
+        insert(db, TokenBlockedList, live, now, now + timedelta(minutes=15))
+        load_seconds = time.perf_counter() - start
+
+        def report(label):
+            cache = RevokedTokenCache(refresh_interval=3600)
+            start = time.perf_counter()
+            cache.is_revoked(unknown[0])
+            warmup = (time.perf_counter() - start) * 1000
+            results = [measure(cache.is_revoked, tokens or unknown, args.lookups) for tokens in (unknown, live, expired)]
+            confirm = lambda token: live_tokens(db.session.query(TokenBlockedList.id)).filter(TokenBlockedList.token == token).first()
+            results.append(measure(confirm, live or unknown, args.lookups))
+            print("%9d %-7s warmup=%7.1f ms  " % (rows, label, warmup) + "  ".join(
+                "%s p50=%6.1f p99=%6.1f us" % (name, p50, p99) for name, (p50, p99) in zip(("unknown", "live", "expired", "db"), results)))
+
+        report("before")
+        start = time.perf_counter()
+        purged = purge_expired_tokens(args.batch_size)
+        purge_seconds = time.perf_counter() - start
+        report("after")
+        print("%9d carga=%.1f s  purge=%d filas en %.1f s" % (rows, load_seconds, purged, purge_seconds))
+        db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[0, 100000, 1000000], help="logouts vencidos en la tabla")
+    parser.add_argument("--live", type=int, default=1000, help="bloqueos vigentes")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000, help="filas por lote de purge_expired_tokens")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DB_CONNECTION_STRING", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "blocklist.db"))
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-length")
+    sys.path.insert(0, SRC)
+    for rows in args.rows:
+        run(rows, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Filas por segundo y memoria máxima de export_rows (GET /export y flask export) según el
+tamaño de la tabla. Para cada tamaño carga esa cantidad de personajes, exporta la tabla a
+/dev/null y reporta filas/s; en una segunda pasada mide el pico de memoria de Python con
+tracemalloc (que hace mucho más lento el export, por eso no se mide en la misma pasada).
+
+    python benchmarks/export_throughput.py --rows 10000 100000 1000000 --format csv ndjson
+
+Usa una BD SQLite temporal que se recrea en cada tamaño (DB_CONNECTION_STRING la reemplaza, p.ej. Postgres).
+"""
+import os
+import sys
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+
+def export(model, fmt, compress, batch_size, stats):
+    from export import export_rows
+    written = 0
+    with open(os.devnull, "wb") as output:
+        for chunk in export_rows(model, fmt, batch_size=batch_size, compress=compress, stats=stats):
+            output.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def run(rows, args):
+    from main import app, db, People
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        table = People.__table__
+        for start in range(0, rows, 10000):
+            db.session.execute(table.insert(), [{"name": "Personaje %d" % i, "gender": "n/a", "homeworld": "Tatooine"} for i in range(start, min(start + 10000, rows))])
+            db.session.commit()
+
+        for fmt in args.format:
+            for compress in (False, True):
+                stats = {}
+                written = export(People, fmt, compress, args.batch_size, stats)
+                tracemalloc.start()
+                export(People, fmt, compress, args.batch_size, {})
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print("%9d %-6s %-4s %9.0f filas/s  %6.1f MB escritos  pico=%6.1f MB" % (
+                    rows, fmt, "gzip" if compress else "", stats["rows_per_second"], written / 1e6, peak / 1e6))
+        db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--format", nargs="+", default=["csv", "ndjson"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="filas por lote del cursor (EXPORT_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DB_CONNECTION_STRING", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "export.db"))
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-enough-length")
+    sys.path.insert(0, SRC)
+    for rows in args.rows:
+        run(rows, args)
+
+
+if __name__ == "__main__":
+    main()
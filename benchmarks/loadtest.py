@@ -0,0 +1,135 @@
+"""
+Prueba de carga local con gunicorn: lecturas del catálogo (GET --path, por defecto /people/1)
+mientras otros clientes hacen /login en paralelo (tormenta de bcrypt). Imprime throughput y
+p50/p99 de las lecturas, y cuántos logins terminaron en 200/401/429/503.
+
+    python benchmarks/loadtest.py --worker-class sync gthread --logins 8
+    python benchmarks/loadtest.py --worker-class sync gthread gevent --logins 0   # solo lecturas
+    python benchmarks/loadtest.py --logins 0 --path "/people?fields=name,gender"   # sin cache, va a la BD
+
+Usa una BD SQLite temporal y solo la librería estándar (más gunicorn, ya en el Pipfile).
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+SEED = """
+from main import app, db, bcrypt, People, User
+with app.app_context():
+    db.create_all()
+    db.session.add(User(email="storm@example.com", password=bcrypt.generate_password_hash("secret").decode("utf-8"), is_active=True, description="bench"))
+    db.session.add_all([People(name="Personaje %d" % i) for i in range(100)])
+    db.session.commit()
+"""
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, fraction):
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def request(url, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as err:
+        return err.code
+    except OSError:
+        #conexión rechazada o timeout: cuenta como error, no detiene el cliente
+        return "error"
+
+def run(worker_class, args):
+    env = dict(os.environ)
+    env.update({
+        "DB_CONNECTION_STRING": "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"),
+        "JWT_SECRET_KEY": env.get("JWT_SECRET_KEY", "bench-secret-key-with-enough-length"),
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "BCRYPT_LOG_ROUNDS": str(args.rounds),
+        "GUNICORN_PRELOAD": "1" if args.preload else "0",
+        #sin límite de intentos: se mide bcrypt, no el throttle de /login
+        "LOGIN_EMAIL_BURST": "1000000",
+        "LOGIN_IP_BURST": "1000000",
+        "PORT": str(free_port())
+    })
+    subprocess.run([sys.executable, "-W", "ignore", "-c", SEED], cwd=SRC, env=env, check=True)
+    gunicorn = [sys.executable, "-c", "import sys; from gunicorn.app.wsgiapp import run; sys.argv[0] = 'gunicorn'; run()"]
+    server = subprocess.Popen(gunicorn + ["-c", os.path.join(ROOT, "gunicorn.conf.py"), "wsgi", "--chdir", SRC], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = "http://127.0.0.1:%s" % env["PORT"]
+    try:
+        for _ in range(100):
+            if request(base + "/people/1") == 200:
+                break
+            time.sleep(0.1)
+        else:
+            raise RuntimeError("gunicorn no respondió en %s" % base)
+
+        stop = time.monotonic() + args.duration
+        latencies = []
+        logins = {}
+        lock = threading.Lock()
+
+        def reader():
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                request(base + args.path)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+
+        def login():
+            while time.monotonic() < stop:
+                status = request(base + "/login", {"email": "storm@example.com", "password": "wrong"})
+                with lock:
+                    logins[status] = logins.get(status, 0) + 1
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)] + [threading.Thread(target=login) for _ in range(args.logins)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("%-8s reads/s=%7.1f  p50=%6.1f ms  p99=%6.1f ms  logins=%s" % (
+        worker_class, len(latencies) / args.duration, percentile(latencies, 0.50) * 1000,
+        percentile(latencies, 0.99) * 1000, json.dumps(logins, sort_keys=True)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--worker-class", nargs="+", default=["sync", "gthread"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4, help="threads por worker en gthread")
+    parser.add_argument("--readers", type=int, default=8, help="clientes leyendo /people/1")
+    parser.add_argument("--logins", type=int, default=8, help="clientes haciendo /login (0 = sin tormenta)")
+    parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_LOG_ROUNDS")
+    parser.add_argument("--path", default="/people/1", help="GET que hacen los lectores")
+    parser.add_argument("--preload", action="store_true", help="GUNICORN_PRELOAD=1")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    for worker_class in args.worker_class:
+        run(worker_class, args)
+
+if __name__ == "__main__":
+    main()
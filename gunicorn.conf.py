@@ -0,0 +1,42 @@
+# Configuración de gunicorn para producción (Procfile: gunicorn -c gunicorn.conf.py wsgi --chdir ./src/)
+# Todo se ajusta con variables de entorno, ver .env.example
+import os
+import sys
+import multiprocessing
+
+bind = "0.0.0.0:" + os.environ.get("PORT", "3000")
+
+# sync: un request por proceso; gthread: varios threads por proceso (GUNICORN_THREADS);
+# gevent: greenlets, requiere instalar gevent (pipenv install gevent)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# preload_app importa main.py una sola vez en el master y los workers lo heredan con fork
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 2))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+
+def post_fork(server, worker):
+    # con preload_app el master pudo abrir conexiones (migraciones, admin, etc.);
+    # cada worker descarta el pool heredado y abre sus propias conexiones
+    if "main" not in sys.modules:
+        return
+    from main import app, db
+    with app.app_context():
+        db.engine.dispose()
+        # también los engines de las réplicas (binds replica_N de DB_REPLICA_URLS)
+        for bind in app.config["SQLALCHEMY_BINDS"] or {}:
+            db.get_engine(app, bind=bind).dispose()
+
+
+def post_worker_init(worker):
+    # la app ya está cargada en el worker (con o sin preload_app): el índice de búsqueda se
+    # construye en su thread antes del primer /search
+    from main import app, search_index
+    search_index.start(app)
@@ -0,0 +1,26 @@
+"""seed the 'user' row in table_version
+
+Revision ID: 4a7d2e9b1c85
+Revises: 9c4e1b7a2d60
+Create Date: 2026-10-18 16:05:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7d2e9b1c85'
+down_revision = '9c4e1b7a2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # suspender/eliminar usuarios incrementa esta fila; si no existe, dos requests a la vez
+    # compiten por el INSERT de bump_table_version y uno termina en IntegrityError (409)
+    op.execute("INSERT INTO table_version (table_name, version) SELECT 'user', 1 WHERE NOT EXISTS (SELECT 1 FROM table_version WHERE table_name = 'user')")
+
+
+def downgrade():
+    op.execute("DELETE FROM table_version WHERE table_name = 'user'")
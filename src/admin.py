@@ -1,15 +1,19 @@
 import os
-from flask_admin import Admin
+import threading
 from models import db, User, People, Favorite_People, Planets, Favorite_Planets, Vehicles, Favorite_Vehicles, TokenBlockedList
-from flask_admin.contrib.sqla import ModelView
 
 def setup_admin(app):
+    #flask_admin se importa recién aquí: con ADMIN_MOUNT=lazy no se carga hasta el primer /admin
+    from flask_admin import Admin
+    from admin_views import ScalableModelView as ModelView
+
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
 
     
     # Add your models here, for example this is how we add a the User model to the admin
+    # (ModelView es ScalableModelView: paginación acotada, conteo estimado y orden/búsqueda por índices)
     admin.add_view(ModelView(User, db.session))
     admin.add_view(ModelView(People, db.session))
     admin.add_view(ModelView(Favorite_People, db.session))
@@ -20,4 +24,33 @@ def setup_admin(app):
     admin.add_view(ModelView(TokenBlockedList, db.session))
 
     # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+    # admin.add_view(ModelView(YourModelName, db.session))
+
+
+class LazyAdmin:
+    #middleware WSGI que monta el admin antes de atender el primer request a /admin
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.mounted = False
+        self._lock = threading.Lock()
+        app.wsgi_app = self
+
+    def __call__(self, environ, start_response):
+        if not self.mounted and environ.get("PATH_INFO", "").startswith("/admin"):
+            with self._lock:
+                if not self.mounted:
+                    setup_admin(self.app)
+                    self.mounted = True
+        return self.wsgi_app(environ, start_response)
+
+
+def mount_admin(app, mode="lazy"):
+    #ADMIN_MOUNT: lazy (primer /admin), eager (al importar) u off (sin admin)
+    if mode == "off":
+        return
+    #en modo debug Flask no deja registrar blueprints después del primer request
+    if mode == "eager" or app.debug:
+        setup_admin(app)
+        return
+    LazyAdmin(app)
@@ -0,0 +1,68 @@
+from flask_admin.contrib.sqla import ModelView
+from sqlalchemy import inspect, select, func, text, literal_column
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+# ModelView para tablas grandes (se importa desde setup_admin, junto con flask_admin):
+#  - page_size acotado en el servidor (?page_size=1000000 no trae la tabla entera)
+#  - sin COUNT(*) exacto: en Postgres se usa la estimación de pg_class y en otros motores
+#    un COUNT acotado a exact_count_limit filas; con búsqueda o filtros (o simple_list_pager=True)
+#    se usa el paginador simple
+#  - las relaciones muchos-a-uno (user, people, homeworld_planet...) vienen en el mismo SELECT
+#  - solo se ordena y se busca por columnas con índice
+
+def indexed_columns(model):
+    table = model.__table__
+    names = set(column.name for column in table.columns if column.primary_key or column.index or column.unique)
+    #la primera columna de cada índice (también los compuestos) puede usarse para ordenar
+    names.update(list(index.columns)[0].name for index in table.indexes)
+    return [column.name for column in table.columns if column.name in names]
+
+
+class ScalableModelView(ModelView):
+    page_size = 20
+    can_set_page_size = True
+    page_size_options = (20, 50, 100)
+    max_page_size = 100
+    exact_count_limit = 10000
+    simple_list_pager = False
+
+    def __init__(self, model, session, **kwargs):
+        indexed = indexed_columns(model)
+        self.column_sortable_list = indexed
+        self.column_searchable_list = [name for name in indexed if model.__table__.columns[name].type.python_type is str]
+        self.column_default_sort = "id"
+        self.eager_relationships = [relationship.key for relationship in inspect(model).relationships if relationship.direction is MANYTOONE]
+        super(ScalableModelView, self).__init__(model, session, **kwargs)
+
+    def get_query(self):
+        query = super(ScalableModelView, self).get_query()
+        return query.options(*[joinedload(getattr(self.model, key)) for key in self.eager_relationships])
+
+    def estimated_count(self):
+        table = self.model.__table__
+        if self.session.get_bind(inspect(self.model)).dialect.name == "postgresql":
+            estimate = self.session.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"), {"table": table.name}).scalar()
+            if estimate is not None and estimate >= self.exact_count_limit:
+                return estimate
+        #tablas chicas u otros motores: COUNT que se detiene en exact_count_limit filas
+        limited = select([literal_column("1")]).select_from(table).limit(self.exact_count_limit).alias("limited")
+        return self.session.execute(select([func.count()]).select_from(limited)).scalar()
+
+    def get_count_query(self):
+        #nunca COUNT(*) exacto: get_list pone la estimación o deja count en None (paginador simple)
+        return None
+
+    def _get_list_extra_args(self):
+        #index_view calcula num_pages y los links con este page_size, por eso se acota aquí
+        view_args = super(ScalableModelView, self)._get_list_extra_args()
+        if view_args.page_size:
+            view_args.page_size = min(view_args.page_size, self.max_page_size)
+        return view_args
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        page_size = min(page_size or self.page_size, self.max_page_size)
+        count, query = super(ScalableModelView, self).get_list(page, sort_column, sort_desc, search, filters, execute=execute, page_size=page_size)
+        if not self.simple_list_pager and not search and not filters:
+            count = self.estimated_count()
+        return count, query
@@ -0,0 +1,176 @@
+import math
+import time
+import hashlib
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from sqlalchemy import or_
+from models import db, TokenBlockedList
+
+# Cache negativo para la revocación de tokens JWT.
+# Un filtro bloom con todos los jti bloqueados responde "no revocado" sin ir a la BD;
+# solo cuando el bloom dice "tal vez" se confirma con una consulta a token_blocked_list.
+# Cada worker sincroniza los bloqueos hechos en otros workers leyendo las filas nuevas
+# (id > último id visto - rescan_window) cada refresh_interval segundos. La ventana se vuelve
+# a leer porque en Postgres/MySQL un id bajo puede hacer commit después de uno más alto (p.ej.
+# con la cola de escritura diferida): con un corte estricto en el último id ese bloqueo no se
+# vería nunca en los otros workers.
+# Las filas guardan el vencimiento del token (expires_at): las vencidas no se cargan ni se
+# consultan, y purge_expired_tokens las borra por lotes (flask purge-blocklist o el thread
+# de BlocklistCompactor).
+
+def live_tokens(query, now=None):
+    #filas sin vencimiento conocido o que todavía no vencen
+    now = now or datetime.utcnow()
+    return query.filter(or_(TokenBlockedList.expires_at == None, TokenBlockedList.expires_at > now))
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevokedTokenCache:
+    def __init__(self, capacity=100000, error_rate=0.001, recent_size=10000, refresh_interval=5, rescan_window=1000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.recent_size = recent_size
+        self.refresh_interval = refresh_interval
+        self.rescan_window = rescan_window
+        self.db_checks = 0
+        self.db_checks_avoided = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._recent = OrderedDict()
+        self._last_id = 0
+        #ids ya cargados dentro de la ventana que se vuelve a leer, para no contarlos dos veces
+        self._window_ids = set()
+        self._last_refresh = None
+        self._lock = threading.Lock()
+
+    def _remember(self, jti):
+        self._bloom.add(jti)
+        self._recent[jti] = True
+        self._recent.move_to_end(jti)
+        while len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+
+    def _refresh(self):
+        #lee las filas nuevas y las de la ventana anterior al último id, usando la llave primaria
+        window_start = self._last_id - self.rescan_window
+        rows = live_tokens(db.session.query(TokenBlockedList.id, TokenBlockedList.token)).filter(TokenBlockedList.id > window_start).order_by(TokenBlockedList.id).yield_per(1000)
+        for row_id, token in rows:
+            if row_id in self._window_ids:
+                continue
+            self._remember(token)
+            self._window_ids.add(row_id)
+            self._last_id = max(self._last_id, row_id)
+        window_start = self._last_id - self.rescan_window
+        self._window_ids = set(row_id for row_id in self._window_ids if row_id > window_start)
+        if self._bloom.count > self.capacity:
+            self._rebuild()
+        self._last_refresh = time.monotonic()
+
+    def _rebuild(self):
+        #el bloom se llenó: se reconstruye solo con los tokens que no han vencido,
+        #con el doble de capacidad si esos ocupan más de la mitad
+        live = live_tokens(db.session.query(TokenBlockedList.id)).count()
+        while live > self.capacity / 2:
+            self.capacity *= 2
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._recent.clear()
+        self._last_id = 0
+        self._window_ids = set()
+        self._refresh()
+
+    def add(self, jti):
+        with self._lock:
+            self._remember(jti)
+
+    def is_revoked(self, jti):
+        with self._lock:
+            if self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval:
+                self._refresh()
+            if jti in self._recent:
+                return True
+            if jti not in self._bloom:
+                self.db_checks_avoided += 1
+                return False
+            self.db_checks += 1
+        return live_tokens(db.session.query(TokenBlockedList.id)).filter(TokenBlockedList.token == jti).first() is not None
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "tokens": self._bloom.count,
+            "recent": len(self._recent),
+            "db_checks": self.db_checks,
+            "db_checks_avoided": self.db_checks_avoided
+        }
+
+
+def purge_expired_tokens(batch_size=1000, now=None):
+    #borra las filas vencidas por lotes de ids: cada lote es una transacción corta,
+    #así nunca se bloquea la tabla entera mientras los logout siguen insertando
+    now = now or datetime.utcnow()
+    deleted = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(TokenBlockedList.id).filter(TokenBlockedList.expires_at <= now).order_by(TokenBlockedList.id).limit(batch_size)]
+        if len(ids) == 0:
+            break
+        db.session.query(TokenBlockedList).filter(TokenBlockedList.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+class BlocklistCompactor:
+    #thread en segundo plano (uno por worker) que llama a purge_expired_tokens cada interval segundos
+    def __init__(self, app, interval=3600, batch_size=1000):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purged = 0
+        self.last_run = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="blocklist-compactor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.purged += purge_expired_tokens(self.batch_size)
+                    self.last_run = datetime.utcnow().isoformat()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("no se pudo compactar token_blocked_list")
+                finally:
+                    db.session.remove()
+
+    def stats(self):
+        return {"interval": self.interval, "purged": self.purged, "last_run": self.last_run}
@@ -0,0 +1,113 @@
+import json
+from models import db
+from utils import APIException
+
+# Carga masiva: el body puede ser un arreglo JSON o NDJSON (un objeto por línea).
+# Las filas se validan por lotes de chunk_size y cada lote se inserta con un solo
+# executemany; todos los lotes van en la misma transacción (el commit lo hace quien llama).
+# Cada valor se convierte al tipo de su columna antes del executemany: una fila inválida
+# queda como error en su resultado y no hace fallar al lote.
+
+class InvalidRow(ValueError):
+    pass
+
+def _coerce(column, value):
+    #mismo criterio que _convert de listing.py, pero el error queda en el resultado de la fila
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if isinstance(value, (dict, list)) or (isinstance(value, bool) and python_type is not bool):
+        raise InvalidRow("%s es inválido" % column.name)
+    if python_type is str and not isinstance(value, str):
+        raise InvalidRow("%s debe ser texto" % column.name)
+    if python_type is int and isinstance(value, float) and not value.is_integer():
+        raise InvalidRow("%s debe ser un número entero" % column.name)
+    try:
+        value = python_type(value)
+    except (ValueError, TypeError):
+        raise InvalidRow("%s es inválido" % column.name)
+    length = getattr(column.type, "length", None)
+    if length is not None and len(value) > length:
+        raise InvalidRow("%s es demasiado largo (máximo %d)" % (column.name, length))
+    return value
+
+def _coerce_row(model, columns, row):
+    table = model.__table__
+    return {column: _coerce(table.columns[column], row.get(column)) for column in columns}
+
+def iter_bulk_rows(request):
+    if request.mimetype in ("application/x-ndjson", "application/jsonlines"):
+        #se lee el stream línea por línea, sin cargar todo el body en memoria
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+        return
+    body = request.get_json(silent=True)
+    if not isinstance(body, list):
+        raise APIException("El body debe ser un arreglo JSON o NDJSON", status_code=400)
+    for row in body:
+        yield row
+
+def _insert_chunk(model, columns, unique_column, chunk, seen, results, prepare):
+    #las filas del lote ya vienen convertidas (ver bulk_insert)
+    #filas que ya existen en la BD, una sola consulta IN por lote usando el índice único
+    existing = set()
+    if unique_column is not None:
+        values = [row[unique_column] for index, row in chunk]
+        column = getattr(model, unique_column)
+        existing = set(value for (value,) in db.session.query(column).filter(column.in_(values)))
+
+    valid = []
+    for index, row in chunk:
+        if unique_column is not None:
+            value = row[unique_column]
+            if value in existing or value in seen:
+                results.append({"index": index, "status": "error", "message": "%s ya existe" % unique_column})
+                continue
+            seen.add(value)
+        valid.append(row)
+        results.append({"index": index, "status": "created"})
+
+    if len(valid) > 0:
+        if prepare is not None:
+            valid = prepare(valid)
+        db.session.execute(model.__table__.insert(), valid)
+    return len(valid)
+
+def bulk_insert(model, rows, chunk_size, unique_column=None, prepare=None):
+    #las columnas con server_default (p.ej. favorite_count) las llena la BD
+    columns = [column.name for column in model.__table__.columns if column.name != "id" and column.server_default is None]
+    results = []
+    seen = set()
+    created = 0
+    chunk = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results.append({"index": index, "status": "error", "message": "fila inválida"})
+            continue
+        if row.get("name") is None or row.get("name") == "":
+            results.append({"index": index, "status": "error", "message": "name es inválido"})
+            continue
+        try:
+            values = _coerce_row(model, columns, row)
+        except InvalidRow as err:
+            results.append({"index": index, "status": "error", "message": str(err)})
+            continue
+        chunk.append((index, values))
+        if len(chunk) >= chunk_size:
+            created += _insert_chunk(model, columns, unique_column, chunk, seen, results, prepare)
+            chunk = []
+    if len(chunk) > 0:
+        created += _insert_chunk(model, columns, unique_column, chunk, seen, results, prepare)
+
+    results.sort(key=lambda result: result["index"])
+    return {
+        "created": created,
+        "errors": len(results) - created,
+        "results": results
+    }
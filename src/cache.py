@@ -0,0 +1,104 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Cache en memoria (por worker) para los diccionarios ya serializados del catálogo.
+# Cualquier objeto con get/set/delete/clear/stats puede reemplazarlo (ver NullCache).
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            "backend": "lru",
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class NullCache:
+    #no guarda nada, sirve para desactivar el cache con ENTITY_CACHE_SIZE=0
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "null"}
+
+
+class PeriodicValue:
+    #valor leído con loader() como máximo cada interval segundos (p.ej. un contador de table_version)
+    def __init__(self, loader, interval=1):
+        self.loader = loader
+        self.interval = interval
+        self.loads = 0
+        self._value = None
+        self._loaded_at = None
+
+    def get(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.interval:
+            self._value = self.loader()
+            self._loaded_at = now
+            self.loads += 1
+        return self._value
+
+    def invalidate(self):
+        #la siguiente lectura vuelve a llamar a loader()
+        self._loaded_at = None
+
+
+def create_cache(maxsize, ttl):
+    if maxsize <= 0:
+        return NullCache()
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,68 @@
+import io
+import csv
+import time
+import zlib
+from flask import current_app
+from sqlalchemy import inspect
+from models import db, People, Planets, Vehicles, Favorite_People, Favorite_Planets, Favorite_Vehicles
+
+# Exportación completa de una tabla a CSV o NDJSON (GET /export/<tabla> y flask export).
+# Las filas salen de un cursor del lado del servidor (stream_results, en Postgres un cursor
+# con nombre) y se leen de a batch_size con fetchmany: se escribe cada lote a la salida
+# antes de pedir el siguiente, así la memoria no depende del tamaño de la tabla.
+# Con gzip la salida se comprime por partes con zlib (formato .gz).
+
+EXPORT_TABLES = {
+    "people": People,
+    "planets": Planets,
+    "vehicles": Vehicles,
+    "favorite_people": Favorite_People,
+    "favorite_planets": Favorite_Planets,
+    "favorite_vehicles": Favorite_Vehicles
+}
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def _ndjson_lines(encoder, columns, rows):
+    return "".join(encoder.encode(dict(zip(columns, row))) + "\n" for row in rows)
+
+def export_rows(model, fmt="csv", batch_size=1000, compress=False, stats=None):
+    #generador de bytes; al terminar deja en stats las filas exportadas, los segundos y filas/s
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    #un solo encoder de la app (fechas, Decimal...) para todo el export: json.dumps arma uno por fila
+    encoder = current_app.json_encoder(ensure_ascii=False, separators=(",", ":"))
+    stats = stats if stats is not None else {}
+    start = time.perf_counter()
+    rows_count = 0
+
+    def output(text):
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    statement = table.select().order_by(table.c.id).execution_options(stream_results=True)
+    result = db.session.execute(statement, mapper=inspect(model))
+    try:
+        if fmt == "csv":
+            yield output(_csv_lines([columns]))
+        while True:
+            rows = result.fetchmany(batch_size)
+            if len(rows) == 0:
+                break
+            rows_count += len(rows)
+            yield output(_csv_lines(rows) if fmt == "csv" else _ndjson_lines(encoder, columns, rows))
+        if compressor:
+            yield compressor.flush()
+    finally:
+        result.close()
+        seconds = time.perf_counter() - start
+        stats.update({"rows": rows_count, "seconds": seconds, "rows_per_second": rows_count / seconds if seconds > 0 else 0})
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from utils import APIException
+
+# Pool acotado para bcrypt: como máximo max_workers hashes en paralelo y max_queue esperando.
+# Si el pool está lleno se responde 503 de inmediato en vez de bloquear al worker de gunicorn.
+# bcrypt libera el GIL mientras calcula el hash, por eso un pool de threads es suficiente.
+# Solo sirve con workers gthread o gevent (GUNICORN_WORKER_CLASS): el límite y el 503 aplican
+# a los requests concurrentes de un mismo proceso. Con workers sync hay un request por proceso,
+# el thread del request espera el hash igual que si lo calculara él mismo y el pool nunca se
+# llena; para ese caso BCRYPT_POOL_SIZE=0 calcula el hash en línea, sin el pool.
+# benchmarks/loadtest.py mide el p99 de las lecturas del catálogo durante una tormenta de logins.
+
+class PasswordHasher:
+    def __init__(self, bcrypt, max_workers=2, max_queue=8, timeout=5):
+        self.bcrypt = bcrypt
+        self.timeout = timeout
+        self.rejected = 0
+        self._executor = None
+        if max_workers > 0:
+            self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise APIException("Servidor ocupado, intenta de nuevo", status_code=503, headers={"Retry-After": "1"})
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise APIException("Servidor ocupado, intenta de nuevo", status_code=503, headers={"Retry-After": "1"})
+
+    def generate(self, password):
+        return self._run(self.bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def check(self, pw_hash, password):
+        return self._run(self.bcrypt.check_password_hash, pw_hash, password)
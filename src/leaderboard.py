@@ -0,0 +1,64 @@
+import time
+import threading
+from sqlalchemy import event
+from routing import RoutingSession
+
+# Top-N en memoria (por worker) de los más agregados a favoritos, por tabla.
+# Se carga desde favorite_count (columna con índice, ORDER BY ... LIMIT size) y se actualiza
+# con los cambios de favoritos que hace este worker, aplicados solo después del commit.
+# Si un elemento del top baja, alguien de afuera podría superarlo: la tabla se recarga en la
+# siguiente consulta. Los cambios de otros workers se ven al recargar cada refresh_interval.
+
+class Leaderboard:
+    def __init__(self, models, size=100, refresh_interval=30):
+        self.models = dict((model.__tablename__, model) for model in models)
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._top = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+        event.listen(RoutingSession, "after_commit", self._after_commit)
+        event.listen(RoutingSession, "after_rollback", self._after_rollback)
+
+    def _load(self, table):
+        model = self.models[table]
+        rows = model.query.with_entities(model.id, model.name, model.favorite_count).filter(model.favorite_count > 0).order_by(model.favorite_count.desc(), model.id).limit(self.size)
+        self._top[table] = dict((item_id, [name, count]) for item_id, name, count in rows)
+        self._loaded_at[table] = time.monotonic()
+
+    def _apply(self, table, item_id, delta):
+        top = self._top.get(table)
+        if top is None:
+            return
+        if item_id in top:
+            top[item_id][1] += delta
+            if delta < 0 and len(top) >= self.size:
+                #podría haber alguien fuera del top con más favoritos
+                self._loaded_at.pop(table, None)
+            return
+        if delta > 0:
+            #no sabemos el total de un elemento que no está en el top: se recarga
+            self._loaded_at.pop(table, None)
+
+    def _after_commit(self, session):
+        deltas = session.info.pop("favorite_deltas", None)
+        if not deltas:
+            return
+        with self._lock:
+            for table, item_id, delta in deltas:
+                self._apply(table, item_id, delta)
+
+    def _after_rollback(self, session):
+        session.info.pop("favorite_deltas", None)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at.clear()
+
+    def top(self, table, n):
+        with self._lock:
+            loaded_at = self._loaded_at.get(table)
+            if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval:
+                self._load(table)
+            items = sorted(self._top[table].items(), key=lambda item: (-item[1][1], item[0]))
+        return [{"id": item_id, "name": name, "favorites": count} for item_id, (name, count) in items[:n] if count > 0]
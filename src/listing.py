@@ -0,0 +1,121 @@
+import re
+from sqlalchemy.orm import joinedload
+from utils import APIException
+
+# Parámetros de los endpoints de lista: ?fields=, ?sort=, ?ids=, ?include= y filtros ?<columna>= o ?<columna>[op]=
+# Solo se aceptan las columnas de model.filter_columns (todas tienen índice en la BD).
+# La proyección y los filtros se agregan al SELECT, así la BD solo devuelve lo que se pidió.
+
+RESERVED_ARGS = set(["limit", "after", "stream", "fields", "sort", "ids", "include"])
+
+# máximo de ids en ?ids=1,2,3
+MAX_IDS = 100
+
+FILTER_OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value
+}
+
+FILTER_ARG = re.compile(r"^(\w+)(?:\[(\w+)\])?$")
+
+# Columnas que cambian sin incrementar table_version (favorite_count lo actualizan los favoritos):
+# con ?fields= quedarían bajo un ETag/cache viejo. El conteo se consulta en /leaderboard.
+UNVERSIONED_COLUMNS = set(["favorite_count"])
+
+def column_names(model):
+    return [column.name for column in model.__table__.columns if column.name not in UNVERSIONED_COLUMNS]
+
+def sortable_columns(model):
+    return ["id", "name"] + list(model.filter_columns)
+
+def parse_fields(model, args):
+    if not args.get("fields"):
+        return None
+    fields = [field.strip() for field in args.get("fields").split(",") if field.strip() != ""]
+    for field in fields:
+        if field not in column_names(model):
+            raise APIException("El campo %s no existe" % field, status_code=400)
+    #el id siempre se incluye, lo necesita la paginación
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+def parse_include(model, args):
+    #?include=homeworld, solo las relaciones de model.include_relations
+    if not args.get("include"):
+        return []
+    include = [name.strip() for name in args.get("include").split(",") if name.strip() != ""]
+    for name in include:
+        if name not in getattr(model, "include_relations", {}):
+            raise APIException("No se puede incluir %s" % name, status_code=400)
+    return include
+
+def include_options(model, include):
+    return [joinedload(getattr(model, model.include_relations[name])) for name in include]
+
+def _convert(column, value):
+    try:
+        return column.type.python_type(value)
+    except (ValueError, TypeError):
+        raise APIException("Valor inválido para %s" % column.name, status_code=400)
+
+def apply_filters(query, model, args):
+    for key in args:
+        if key in RESERVED_ARGS:
+            continue
+        match = FILTER_ARG.match(key)
+        if match is None or match.group(1) not in model.filter_columns:
+            raise APIException("No se puede filtrar por %s" % key, status_code=400)
+        operator = match.group(2) or "eq"
+        if operator not in FILTER_OPERATORS:
+            raise APIException("Operador %s no soportado" % operator, status_code=400)
+        column = getattr(model, match.group(1))
+        for value in args.getlist(key):
+            query = query.filter(FILTER_OPERATORS[operator](column, _convert(column, value)))
+    return query
+
+def apply_ids(query, model, args):
+    #?ids=1,2,3 se resuelve con un solo WHERE id IN (...)
+    if not args.get("ids"):
+        return query
+    try:
+        ids = [int(item_id) for item_id in args.get("ids").split(",") if item_id.strip() != ""]
+    except ValueError:
+        raise APIException("ids debe ser una lista de números separados por coma", status_code=400)
+    if len(ids) > MAX_IDS:
+        raise APIException("No se pueden pedir más de %d ids" % MAX_IDS, status_code=400)
+    return query.filter(model.id.in_(ids))
+
+def apply_sort(query, model, args):
+    sort = args.get("sort")
+    if not sort:
+        return query.order_by(model.id)
+    orders = []
+    for name in sort.split(","):
+        name = name.strip()
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        if name not in sortable_columns(model):
+            raise APIException("No se puede ordenar por %s" % name, status_code=400)
+        column = getattr(model, name)
+        orders.append(column.desc() if descending else column.asc())
+    #id como desempate para que el orden sea estable
+    return query.order_by(*orders, model.id)
+
+def apply_fields(query, model, fields, include=()):
+    if fields is None:
+        if len(include) > 0:
+            #las relaciones incluidas vienen en el mismo SELECT (JOIN), sin consultas extra por fila
+            return query.options(*include_options(model, include)), lambda item: item.serialize(include)
+        return query, model.serialize
+    if len(include) > 0:
+        raise APIException("include no se puede usar junto con fields", status_code=400)
+    query = query.with_entities(*[getattr(model, field) for field in fields])
+    return query, lambda row: row._asdict()
+
+def has_list_args(args):
+    return any(key not in ("limit", "after", "stream") for key in args)
@@ -2,18 +2,34 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, request, jsonify, url_for
-from flask_migrate import Migrate
-from flask_swagger import swagger
+import click
+from functools import wraps
+from flask import Flask, request, jsonify, url_for, Response, stream_with_context
 from flask_cors import CORS
-from utils import APIException, generate_sitemap
-from admin import setup_admin
-from models import db, User, People, Favorite_People, Planets, Favorite_Planets, Vehicles, Favorite_Vehicles, TokenBlockedList
+from utils import APIException, generate_sitemap, wants_pagination, paginate_query, engine_options
+from admin import mount_admin
+from cache import create_cache, PeriodicValue
+from blocklist import RevokedTokenCache, BlocklistCompactor, purge_expired_tokens
+from hashing import PasswordHasher
+from throttle import MemoryBucketStore, LoginThrottle
+from writebehind import WriteBehindQueue
+from bulk import iter_bulk_rows, bulk_insert
+from streaming import wants_stream, stream_ndjson
+from export import EXPORT_TABLES, EXPORT_MIMETYPES, export_rows
+from listing import parse_fields, parse_include, include_options, apply_filters, apply_ids, apply_sort, apply_fields, has_list_args
+from search import SearchIndex
+from metrics import RequestMetrics, timed_serialize
+from leaderboard import Leaderboard
+from query_inspector import QueryInspector
+from models import db, User, People, Favorite_People, Planets, Favorite_Planets, Vehicles, Favorite_Vehicles, TokenBlockedList, get_table_version, bump_table_version, record_search_reset, resolve_homeworld_ids, reconcile_favorite_counts
 from datetime import date, time, datetime, timezone
+from collections import namedtuple
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 #from models import Person
 
 #importar jwt-flask-extended
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt, current_user, verify_jwt_in_request
 
 #importar Bcrypt para encriptar
 from flask_bcrypt import Bcrypt
@@ -24,21 +40,304 @@ app = Flask(__name__)
 app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")  # Change this!
 jwt = JWTManager(app)
 
-# Setup de Bcrypt
+# Revocación de tokens para todos los endpoints con @jwt_required, con cache negativo en memoria
+revoked_tokens = RevokedTokenCache(capacity=int(os.environ.get('BLOCKLIST_CAPACITY', 100000)), refresh_interval=float(os.environ.get('BLOCKLIST_REFRESH_SECONDS', 5)), rescan_window=int(os.environ.get('BLOCKLIST_RESCAN_WINDOW', 1000)))
+
+# Escritura diferida opcional para logout y favoritos: WRITE_BEHIND=off|group|async (ver writebehind.py)
+write_queue = None
+if os.environ.get('WRITE_BEHIND', 'off') in ('group', 'async'):
+    write_queue = WriteBehindQueue(app, flush_ms=float(os.environ.get('WRITE_BEHIND_FLUSH_MS', 20)), max_rows=int(os.environ.get('WRITE_BEHIND_MAX_ROWS', 500)), durability=os.environ.get('WRITE_BEHIND'), wait_seconds=float(os.environ.get('WRITE_BEHIND_WAIT_SECONDS', 5)))
+
+def is_pending_write(*key):
+    return write_queue is not None and write_queue.is_pending(key)
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    #un bloqueo que todavía está en la cola de escritura también cuenta
+    return is_pending_write("token_blocked_list", jwt_payload["jti"]) or revoked_tokens.is_revoked(jwt_payload["jti"])
+
+# Compactación opcional de token_blocked_list en segundo plano (BLOCKLIST_COMPACT_SECONDS=0 la desactiva)
+blocklist_compactor = BlocklistCompactor(app, interval=float(os.environ.get('BLOCKLIST_COMPACT_SECONDS', 0)), batch_size=int(os.environ.get('BLOCKLIST_COMPACT_BATCH', 1000)))
+if blocklist_compactor.interval > 0:
+    #se arranca en el primer request, así cada worker de gunicorn tiene su propio thread
+    app.before_first_request(blocklist_compactor.start)
+
+@jwt.revoked_token_loader
+def revoked_token_response(jwt_header, jwt_payload):
+    return jsonify(msg="Acceso Denegado"), 401
+
+# Usuario del token (current_user) con cache por worker de USER_CACHE_TTL segundos: los
+# endpoints protegidos no consultan la tabla user en cada request. La llave incluye la versión
+# "user" de table_version, que suspender o eliminar un usuario incrementa. Cada worker lee esa
+# versión (de la BD principal) como máximo cada USER_VERSION_CHECK_SECONDS, no en cada request:
+# el worker que hizo el cambio lo ve de inmediato y los demás a lo sumo ese tiempo después.
+CurrentUser = namedtuple("CurrentUser", ["id", "email", "is_active", "description"])
+user_cache = create_cache(int(os.environ.get('USER_CACHE_SIZE', 1024)), float(os.environ.get('USER_CACHE_TTL', 5)))
+user_version = PeriodicValue(lambda: get_table_version(User.__tablename__, primary=True), interval=float(os.environ.get('USER_VERSION_CHECK_SECONDS', 1)))
+
+# ids de los usuarios que pueden suspender/reactivar a otros
+admin_user_ids = set(int(user_id) for user_id in os.environ.get('ADMIN_USER_IDS', '1').split(',') if user_id.strip() != '')
+
+@jwt.user_lookup_loader
+def load_current_user(jwt_header, jwt_payload):
+    user_id = jwt_payload["sub"]
+    key = (user_id, user_version.get())
+    cached = user_cache.get(key)
+    if cached is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        cached = CurrentUser(user.id, user.email, user.is_active, user.description)
+        user_cache.set(key, cached)
+    #un usuario suspendido no puede usar los endpoints protegidos
+    if not cached.is_active:
+        return None
+    return cached
+
+@jwt.user_lookup_error_loader
+def current_user_error_response(jwt_header, jwt_payload):
+    return jsonify(msg="Acceso Denegado"), 401
+
+# Setup de Bcrypt, el costo (work factor) se configura con BCRYPT_LOG_ROUNDS
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 10))
 bcrypt = Bcrypt(app)
 
+# los hashes se calculan fuera del worker, en un pool acotado (503 si está saturado)
+password_hasher = PasswordHasher(bcrypt, max_workers=int(os.environ.get('BCRYPT_POOL_SIZE', 2)), max_queue=int(os.environ.get('BCRYPT_QUEUE_SIZE', 8)))
+
+# límite de intentos de /login por email y por IP (429 antes de llegar a bcrypt)
+login_throttle = LoginThrottle(MemoryBucketStore(), email_burst=int(os.environ.get('LOGIN_EMAIL_BURST', 5)), email_per_minute=float(os.environ.get('LOGIN_EMAIL_PER_MINUTE', 5)), ip_burst=int(os.environ.get('LOGIN_IP_BURST', 20)), ip_per_minute=float(os.environ.get('LOGIN_IP_PER_MINUTE', 20)))
+# detrás del router de Heroku remote_addr es el router; el cliente real es el último X-Forwarded-For
+TRUST_X_FORWARDED_FOR = os.environ.get('TRUST_X_FORWARDED_FOR', '0') == '1'
+
 app.url_map.strict_slashes = False
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DB_CONNECTION_STRING')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-MIGRATE = Migrate(app, db)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+# Réplicas de solo lectura opcionales para los GET, DB_REPLICA_URLS separadas por coma
+replica_urls = [url.strip() for url in os.environ.get('DB_REPLICA_URLS', '').split(',') if url.strip() != '']
+app.config['SQLALCHEMY_BINDS'] = dict(("replica_%d" % i, url) for i, url in enumerate(replica_urls))
+app.config['SQLALCHEMY_REPLICA_BINDS'] = sorted(app.config['SQLALCHEMY_BINDS'])
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+# flask_migrate importa alembic (lento); solo hace falta para los comandos `flask db ...`
+if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+    from flask_migrate import Migrate
+    MIGRATE = Migrate(app, db)
 db.init_app(app)
 CORS(app)
-setup_admin(app)
+# el admin se monta en el primer request a /admin (ADMIN_MOUNT=lazy|eager|off)
+mount_admin(app, os.environ.get('ADMIN_MOUNT', 'lazy'))
+
+# Server-Timing (queries, tiempo en BD, serialize(), JSON) en cada respuesta y histogramas en GET /metrics
+request_metrics = None
+if os.environ.get('METRICS_ENABLED', '1') == '1':
+    request_metrics = RequestMetrics(app)
+
+# Detector de N+1 y queries lentas, solo para desarrollo/CI (QUERY_INSPECTOR_STRICT=1 hace fallar el request)
+if os.environ.get('QUERY_INSPECTOR', '0') == '1':
+    QueryInspector(app, repeat_threshold=int(os.environ.get('QUERY_INSPECTOR_REPEAT', 5)), slow_ms=float(os.environ.get('QUERY_INSPECTOR_SLOW_MS', 100)), strict=os.environ.get('QUERY_INSPECTOR_STRICT', '0') == '1')
+
+# Cache de los diccionarios serializados de people/planets/vehicles (llaves: (tabla, versión, id) y (tabla, versión, "list"))
+# La versión es el contador de table_version: una escritura en cualquier worker cambia la llave, así
+# ningún worker vuelve a servir la entrada vieja (queda en el LRU hasta que vence o se desaloja).
+entity_cache = create_cache(int(os.environ.get('ENTITY_CACHE_SIZE', 1024)), int(os.environ.get('ENTITY_CACHE_TTL', 300)))
+
+# Índice de búsqueda por nombre para GET /search, lo construye y mantiene un thread por worker
+# (post_worker_init en gunicorn.conf.py; con flask run se arranca en el primer request)
+search_index = SearchIndex([People, Planets, Vehicles], refresh_interval=float(os.environ.get('SEARCH_REFRESH_SECONDS', 30)), retention=float(os.environ.get('SEARCH_CHANGES_RETENTION', 3600)))
+app.before_first_request(lambda: search_index.start(app))
+# segundos que espera una búsqueda mientras el índice se construye antes de responder 503
+SEARCH_READY_TIMEOUT = float(os.environ.get('SEARCH_READY_TIMEOUT', 5))
+
+# filas por lote del cursor de GET /export y flask export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+last_export = {}
+
+# Top de favoritos en memoria para GET /leaderboard
+leaderboard = Leaderboard([People, Planets, Vehicles], size=int(os.environ.get('LEADERBOARD_SIZE', 100)), refresh_interval=float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 30)))
+
+def entity_version(model):
+    return get_table_version(model.__tablename__)
+
+# ETag fuerte a partir del contador de versión de la tabla, se compara antes de leer/serializar filas.
+# La misma versión se usa en la llave del cache, así el ETag y el body siempre corresponden.
+def entity_etag(model, version, *parts):
+    return "-".join([model.__tablename__, str(version)] + [str(part) for part in parts])
+
+# Guarda en el cache solo si nadie escribió en la tabla mientras se leían las filas (la versión
+# no cambió): si cambió, el body puede ser más nuevo que la versión del ETag y no se cachea ni
+# se le pone ETag. Las versiones solo suben, así que versión igual = filas de esa versión.
+def cache_if_current(model, version, key, value):
+    if entity_version(model) != version:
+        return False
+    entity_cache.set(key, value)
+    return True
+
+# Lo mismo para las respuestas que no se cachean (?fields=, filtros, include...): el ETag solo se
+# pone si ninguna de las tablas de la respuesta cambió de versión mientras se leían las filas.
+# versions son pares (modelo, versión leída antes de las filas).
+def tag_if_current(response, etag, *versions):
+    if all(entity_version(model) == version for model, version in versions):
+        response.set_etag(etag)
+    return response
+
+def not_modified(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return response
+
+#Las listas salen en JSON o en NDJSON según el header Accept: el formato va en el ETag y la
+#respuesta lleva Vary: Accept, así un cache no entrega una versión a quien pidió la otra
+def list_etag(etag):
+    return etag + "-ndjson" if wants_stream(request) else etag
+
+def vary_on_accept(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = app.make_response(view(*args, **kwargs))
+        response.vary.add("Accept")
+        return response
+    return wrapper
+
+#Respuesta común de GET /people, /planets y /vehicles
+#?fields=, ?sort= y los filtros se aplican en el SELECT; la lista completa sin parámetros sale del cache
+#depends: otras tablas (modelo, versión) de las que depende la respuesta, p.ej. planets con ?include=
+def list_entities(model, version, etag, depends=()):
+    if not has_list_args(request.args) and not wants_stream(request) and not wants_pagination(request.args):
+        cached = entity_cache.get((model.__tablename__, version, "list"))
+        if cached is not None:
+            return with_etag(jsonify(cached), etag), 200
+        items = list(map(timed_serialize(lambda item: item.serialize()), model.query.all()))
+        if not cache_if_current(model, version, (model.__tablename__, version, "list"), items):
+            return jsonify(items), 200
+        return with_etag(jsonify(items), etag), 200
+
+    query = apply_ids(apply_filters(model.query, model, request.args), model, request.args)
+    query, serialize = apply_fields(query, model, parse_fields(model, request.args), parse_include(model, request.args))
+    serialize = timed_serialize(serialize)
+    versions = [(model, version)] + list(depends)
+    #stream NDJSON con Accept: application/x-ndjson o ?stream=1
+    #sin ETag: las filas se leen después de enviar los headers y la versión no se puede volver a revisar
+    if wants_stream(request):
+        #el stream siempre trae todas las filas: no tiene dónde devolver el cursor de la siguiente página
+        if wants_pagination(request.args):
+            raise APIException("limit/after no se pueden usar con stream", status_code=400)
+        return stream_ndjson(apply_sort(query, model, request.args), serialize), 200
+    #paginación opcional con ?limit=&after=<cursor>, siempre ordenada por id
+    if wants_pagination(request.args):
+        if request.args.get("sort", "id") != "id":
+            raise APIException("sort no se puede usar junto con limit/after", status_code=400)
+        items, next_cursor = paginate_query(query, model, request.args)
+        items = list(map(serialize, items))
+        return tag_if_current(jsonify({"results": items, "next": next_cursor}), etag, *versions), 200
+    items = list(map(serialize, apply_sort(query, model, request.args)))
+    return tag_if_current(jsonify(items), etag, *versions), 200
 
 # Handle/serialize errors like a JSON object
 @app.errorhandler(APIException)
 def handle_invalid_usage(error):
-    return jsonify(error.to_dict()), error.status_code
+    return jsonify(error.to_dict()), error.status_code, error.headers or {}
+
+# Las restricciones únicas de la BD (email, name) terminan aquí cuando dos inserts compiten
+@app.errorhandler(IntegrityError)
+def handle_integrity_error(error):
+    db.session.rollback()
+    return jsonify({"message": "El registro ya existe"}), 409
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    stats = entity_cache.stats()
+    stats["blocklist"] = revoked_tokens.stats()
+    stats["blocklist"]["compactor"] = blocklist_compactor.stats()
+    stats["search"] = search_index.stats()
+    stats["users"] = user_cache.stats()
+    stats["users"]["version_checks"] = user_version.loads
+    stats["login_throttle"] = login_throttle.stats()
+    stats["export"] = last_export
+    if write_queue is not None:
+        stats["write_behind"] = write_queue.stats()
+    return jsonify(stats), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if request_metrics is None:
+        raise APIException("Las métricas están desactivadas", status_code=404)
+    return app.response_class(request_metrics.render(), mimetype="text/plain; version=0.0.4")
+
+#Función post para ejecutar varios requests en uno solo (menos viajes de ida y vuelta para el front)
+#body: [{"method": "GET", "path": "/people/1"}, {"method": "POST", "path": "/planet", "body": {...}}, ...]
+MAX_BATCH_REQUESTS = 20
+BATCH_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+
+def subrequest_error(sub):
+    #se valida cada sub-request antes de despacharlo: un item inválido es un 400 solo para ese item
+    if not isinstance(sub, dict) or not isinstance(sub.get("path"), str) or not sub["path"].startswith("/"):
+        return "Cada sub-request necesita un path"
+    if sub["path"].split("?")[0].rstrip("/") == "/batch":
+        return "No se puede anidar /batch"
+    method = sub.get("method", "GET")
+    if not isinstance(method, str) or method.upper() not in BATCH_METHODS:
+        return "method debe ser uno de %s" % ", ".join(BATCH_METHODS)
+    headers = sub.get("headers")
+    if headers is not None and (not isinstance(headers, dict) or not all(isinstance(name, str) and isinstance(value, str) for name, value in headers.items())):
+        return "headers debe ser un objeto con valores de texto"
+    return None
+
+def run_subrequest(sub, read_primary=False):
+    error = subrequest_error(sub)
+    if error is not None:
+        return {"status": 400, "body": {"message": error}}
+    headers = {}
+    #el token y las cookies (p.ej. read_primary_until) son los del request externo
+    for name in ("Authorization", "Cookie"):
+        if name in request.headers:
+            headers[name] = request.headers[name]
+    headers.update(sub.get("headers") or {})
+    #la IP del cliente es la del request externo: un sub-request no puede cambiarla con
+    #X-Forwarded-For (el límite de /login por IP usa remote_addr/access_route)
+    for name in [name for name in headers if name.lower() == "x-forwarded-for"]:
+        del headers[name]
+    if "X-Forwarded-For" in request.headers:
+        headers["X-Forwarded-For"] = request.headers["X-Forwarded-For"]
+    #después de una escritura en el mismo batch las lecturas van a la BD principal (ver routing.py)
+    if read_primary:
+        headers["X-Read-Primary"] = "1"
+    environ_base = {"REMOTE_ADDR": request.remote_addr}
+    #app context propio para que g (métricas, réplicas, etc.) no se mezcle con el del request externo
+    with app.app_context(), app.test_request_context(sub["path"], method=sub.get("method", "GET").upper(), json=sub.get("body"), headers=headers, environ_base=environ_base):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as err:
+            db.session.rollback()
+            print(err)
+            return {"status": 500, "body": {"message": "error interno"}}
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+        result = {"status": response.status_code, "body": body}
+        if response.headers.get("ETag"):
+            result["etag"] = response.headers["ETag"]
+        return result
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    body = request.get_json(silent=True)
+    if not isinstance(body, list) or len(body) == 0:
+        raise APIException("El body debe ser una lista de sub-requests", status_code=400)
+    if len(body) > MAX_BATCH_REQUESTS:
+        raise APIException("No se pueden enviar más de %d sub-requests" % MAX_BATCH_REQUESTS, status_code=400)
+    results = []
+    read_primary = False
+    for sub in body:
+        result = run_subrequest(sub, read_primary)
+        if result["status"] < 400 and sub.get("method", "GET").upper() not in ("GET", "HEAD"):
+            read_primary = True
+        results.append(result)
+    return jsonify(results), 200
 
 # generate sitemap with all your endpoints
 @app.route('/')
@@ -73,22 +372,25 @@ def create_new_user():
         else:
             descripcion=body['description']
 
-        password = bcrypt.generate_password_hash(body['password'],10).decode("utf-8")
+        #búsqueda por el índice único de email, antes de gastar tiempo en bcrypt
+        if db.session.query(User.id).filter_by(email=body['email']).first() is not None:
+            raise APIException("El usuario ya existe" , status_code=409)
 
-        new_user = User(email=body['email'], password=password, is_active=True, description=descripcion)
-        users = User.query.all()
-        users = list(map( lambda user: user.serialize(), users))
+        password = password_hasher.generate(body['password'])
 
-        for i in range(len(users)):
-            if(users[i]['email']==new_user.serialize()['email']):
-                raise APIException("El usuario ya existe" , status_code=400)
-                
+        new_user = User(email=body['email'], password=password, is_active=True, description=descripcion)
         print(new_user)
         #print(new_user.serialize())
         db.session.add(new_user) 
         db.session.commit()
         return jsonify({"mensaje": "Usuario creado exitosamente"}), 201
 
+    except APIException:
+        db.session.rollback()
+        raise
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"mensaje": "El usuario ya existe"}), 409
     except Exception as err:
         db.session.rollback()
         print(err)
@@ -116,75 +418,228 @@ def delete_user_by_id(user_id):
         raise APIException("El usuario no existe", status_code=400)  
     #print(user.serialize())
     db.session.delete(user)
+    bump_table_version(User.__tablename__)
     db.session.commit()
+    user_version.invalidate()
     return jsonify("usuario eliminado exitosamente"), 200
 
 #Función get para llamar a todos los personajes de la base de datos
 @app.route('/people', methods=['GET'])
+@vary_on_accept
 def get_people():
-    peoples = People.query.all()
-    #print(users)
-    peoples = list(map( lambda people: people.serialize(), peoples)) 
-    #print(users)  
-    return jsonify(peoples), 200
+    version = entity_version(People)
+    etag = entity_etag(People, version)
+    depends = []
+    #?include=homeworld: la respuesta también depende de la tabla planets
+    if request.args.get('include'):
+        depends.append((Planets, entity_version(Planets)))
+        etag = etag + "-" + entity_etag(Planets, depends[0][1])
+    etag = list_etag(etag)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    return list_entities(People, version, etag, depends)
 
 #Función get para llamar personajes individualmente de la base de datos
 @app.route('/people/<int:people_id>', methods=['GET'])
 def get_people_by_id(people_id):
     if people_id==0:
         raise APIException("Id no puede ser igual a 0", status_code=400)  
+    include = parse_include(People, request.args)
+    version = entity_version(People)
+    etag = entity_etag(People, version, people_id)
+    if len(include) > 0:
+        planets_version = entity_version(Planets)
+        etag = etag + "-" + entity_etag(Planets, planets_version)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    if len(include) > 0:
+        #el personaje y su planeta en un solo SELECT con JOIN
+        person = People.query.options(*include_options(People, include)).get(people_id)
+        if person == None:
+            raise APIException("El usuario no existe", status_code=400)  
+        return tag_if_current(jsonify(timed_serialize(person.serialize)(include)), etag, (People, version), (Planets, planets_version)), 200
+    cached = entity_cache.get(("people", version, people_id))
+    if cached is not None:
+        return with_etag(jsonify(cached), etag), 200
     person = People.query.get(people_id)
     if person == None:
         raise APIException("El usuario no existe", status_code=400)  
-    return jsonify(person.serialize()), 200
+    person = timed_serialize(person.serialize)()
+    if not cache_if_current(People, version, ("people", version, people_id), person):
+        return jsonify(person), 200
+    return with_etag(jsonify(person), etag), 200
 
 #Función get para llamar a todos los planetas de la base de datos
 @app.route('/planets', methods=['GET'])
+@vary_on_accept
 def get_planets():
-    planets = Planets.query.all()
-    planets = list(map( lambda planet: planet.serialize(), planets))  
-    return jsonify(planets), 200
+    version = entity_version(Planets)
+    etag = list_etag(entity_etag(Planets, version))
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    return list_entities(Planets, version, etag)
 
 #Función get para llamar planetas individualmente de la base de datos
 @app.route('/planet/<int:planet_id>', methods=['GET'])
 def get_planet_by_id(planet_id):
     if planet_id==0:
         raise APIException("Id no puede ser igual a 0", status_code=400)  
+    version = entity_version(Planets)
+    etag = entity_etag(Planets, version, planet_id)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    cached = entity_cache.get(("planets", version, planet_id))
+    if cached is not None:
+        return with_etag(jsonify(cached), etag), 200
     planet = Planets.query.get(planet_id)
     if planet == None:
         raise APIException("El planeta no existe", status_code=400)  
-    return jsonify(planet.serialize()), 200
+    planet = timed_serialize(planet.serialize)()
+    if not cache_if_current(Planets, version, ("planets", version, planet_id), planet):
+        return jsonify(planet), 200
+    return with_etag(jsonify(planet), etag), 200
 
 #Función get para llamar a todos los vehículos de la base de datos
 @app.route('/vehicles', methods=['GET'])
+@vary_on_accept
 def get_vehicles():
-    vehicles = Vehicles.query.all()
-    vehicles = list(map( lambda vehicle: vehicle.serialize(), vehicles))  
-    return jsonify(vehicles), 200
+    version = entity_version(Vehicles)
+    etag = list_etag(entity_etag(Vehicles, version))
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    return list_entities(Vehicles, version, etag)
 
 #Función get para llamar vehículos individualmente de la base de datos
 @app.route('/vehicle/<int:vehicle_id>', methods=['GET'])
 def get_vehicle_by_id(vehicle_id):
     if vehicle_id==0:
         raise APIException("Id no puede ser igual a 0", status_code=400)  
+    version = entity_version(Vehicles)
+    etag = entity_etag(Vehicles, version, vehicle_id)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    cached = entity_cache.get(("vehicles", version, vehicle_id))
+    if cached is not None:
+        return with_etag(jsonify(cached), etag), 200
     vehicle = Vehicles.query.get(vehicle_id)
     if vehicle == None:
         raise APIException("El vehículo no existe", status_code=400)  
-    return jsonify(vehicle.serialize()), 200
-
-#Función get para llamar a la lista de personajes favoritos del usuario
+    vehicle = timed_serialize(vehicle.serialize)()
+    if not cache_if_current(Vehicles, version, ("vehicles", version, vehicle_id), vehicle):
+        return jsonify(vehicle), 200
+    return with_etag(jsonify(vehicle), etag), 200
+
+#Función get para llamar a la lista de favoritos del usuario autenticado
+#cada tabla pivote se consulta una sola vez con joinedload: 3 queries sin importar cuántos favoritos haya
+#(se omiten los favoritos cuyo personaje/planeta/vehículo fue eliminado)
 @app.route('/user/favorites', methods=['GET'])
+@jwt_required()
 def get_favorites():
-    favorite_peoples = Favorite_People.query.all()
+    user_id = get_jwt_identity()
+    favorite_peoples = Favorite_People.query.options(joinedload(Favorite_People.user), joinedload(Favorite_People.people)).filter(Favorite_People.user_id==user_id, Favorite_People.people_id.isnot(None)).all()
     favorite_peoples = list(map( lambda favorite_people: favorite_people.serialize(), favorite_peoples))
-    favorite_planets = Favorite_Planets.query.all()
+    favorite_planets = Favorite_Planets.query.options(joinedload(Favorite_Planets.user), joinedload(Favorite_Planets.planets)).filter(Favorite_Planets.user_id==user_id, Favorite_Planets.planet_id.isnot(None)).all()
     favorite_planets = list(map( lambda favorite_planet: favorite_planet.serialize(), favorite_planets))
-    favorite_vehicles = Favorite_Planets.query.all()
+    favorite_vehicles = Favorite_Vehicles.query.options(joinedload(Favorite_Vehicles.user), joinedload(Favorite_Vehicles.vehicles)).filter(Favorite_Vehicles.user_id==user_id, Favorite_Vehicles.vehicle_id.isnot(None)).all()
     favorite_vehicles = list(map( lambda favorite_vehicle: favorite_vehicle.serialize(), favorite_vehicles))
     favorites_list =  favorite_peoples + favorite_planets + favorite_vehicles
-    print(favorites_list)
     return jsonify(favorites_list), 200
 
+#Funciones para agregar items a la lista de favoritos del usuario autenticado
+#favorite_count de la tabla correspondiente se actualiza en la misma transacción (eventos en models.py)
+
+def add_favorite(pivot, column, model, item_id, name):
+    user_id = get_jwt_identity()
+    if item_id==0:
+        raise APIException("Id no puede ser igual a 0", status_code=400)
+    if db.session.query(model.id).filter_by(id=item_id).first() is None:
+        raise APIException("El %s no existe" % name, status_code=400)
+    if is_pending_write(pivot.__tablename__, user_id, item_id) or db.session.query(pivot.id).filter_by(user_id=user_id, **{column: item_id}).first() is not None:
+        raise APIException("El %s ya está en favoritos" % name, status_code=409)
+    if write_queue is not None:
+        write_queue.enqueue(pivot, {"user_id": user_id, column: item_id}, key=(pivot.__tablename__, user_id, item_id))
+    else:
+        db.session.add(pivot(user_id=user_id, **{column: item_id}))
+        db.session.commit()
+    return jsonify({"mensaje": "Favorito agregado exitosamente"}), 201
+
+@app.route('/favorites/people/<int:item_id>', methods=['POST'])
+@jwt_required()
+def add_favorite_character(item_id):
+    return add_favorite(Favorite_People, "people_id", People, item_id, "personaje")
+
+@app.route('/favorites/planet/<int:item_id>', methods=['POST'])
+@jwt_required()
+def add_favorite_planet(item_id):
+    return add_favorite(Favorite_Planets, "planet_id", Planets, item_id, "planeta")
+
+@app.route('/favorites/vehicle/<int:item_id>', methods=['POST'])
+@jwt_required()
+def add_favorite_vehicle(item_id):
+    return add_favorite(Favorite_Vehicles, "vehicle_id", Vehicles, item_id, "vehículo")
+
+#Funciones para quitar items de la lista de favoritos del usuario autenticado
+#solo se borra la fila de la tabla pivote del usuario del token, nunca el personaje/planeta/vehículo
+
+def remove_favorite(pivot, column, item_id, name):
+    user_id = get_jwt_identity()
+    if item_id==0:
+        raise APIException("Id no puede ser igual a 0", status_code=400)
+    #un favorito que todavía está en la cola (o en el lote que el thread está guardando) se guarda antes de borrarlo
+    if is_pending_write(pivot.__tablename__, user_id, item_id):
+        write_queue.wait_for((pivot.__tablename__, user_id, item_id))
+    favorites = pivot.query.filter_by(user_id=user_id, **{column: item_id}).all()
+    if len(favorites) == 0:
+        raise APIException("El %s no está en favoritos" % name, status_code=404)
+    for favorite in favorites:
+        db.session.delete(favorite)
+    db.session.commit()
+    return jsonify({"mensaje": "Favorito eliminado exitosamente"}), 200
+
+@app.route('/user/favorites/people/<int:item_id>', methods=['DELETE'])
+@jwt_required()
+def remove_favorite_character(item_id):
+    return remove_favorite(Favorite_People, "people_id", item_id, "personaje")
+
+@app.route('/user/favorites/planet/<int:item_id>', methods=['DELETE'])
+@jwt_required()
+def remove_favorite_planet(item_id):
+    return remove_favorite(Favorite_Planets, "planet_id", item_id, "planeta")
+
+@app.route('/user/favorites/vehicle/<int:item_id>', methods=['DELETE'])
+@jwt_required()
+def remove_favorite_vehicle(item_id):
+    return remove_favorite(Favorite_Vehicles, "vehicle_id", item_id, "vehículo")
+
+#Función get para los más agregados a favoritos: ?type=people|planets|vehicles&n=10
+@app.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    table = request.args.get('type', 'people')
+    if table not in leaderboard.models:
+        raise APIException("type debe ser people, planets o vehicles", status_code=400)
+    try:
+        n = int(request.args.get('n', 10))
+    except ValueError:
+        raise APIException("n debe ser un número entero", status_code=400)
+    if n < 1 or n > leaderboard.size:
+        raise APIException("n debe estar entre 1 y %d" % leaderboard.size, status_code=400)
+    return jsonify(leaderboard.top(table, n)), 200
+
+#Comando para recalcular favorite_count desde cero: flask reconcile-favorites
+@app.cli.command("reconcile-favorites")
+def reconcile_favorites_command():
+    reconcile_favorite_counts()
+    db.session.commit()
+    leaderboard.invalidate()
+    print("favorite_count recalculado")
+
+#Comando para borrar los tokens bloqueados que ya vencieron: flask purge-blocklist [--batch-size 1000]
+@app.cli.command("purge-blocklist")
+@click.option("--batch-size", default=1000, help="filas borradas por transacción")
+def purge_blocklist_command(batch_size):
+    deleted = purge_expired_tokens(batch_size)
+    print("%d tokens vencidos eliminados" % deleted)
+
 #Funciones para agregar items a cada tabla (personajes, planetas, vehículos)
 
 #Función post para agregar personajes individuales a la base de datos
@@ -197,18 +652,15 @@ def create_new_person():
     if body['name'] is None or body['name']=="":
         raise APIException("name es inválido" , status_code=400)
 
-    new_character = People(name=body['name'], height=body['height'], mass=body['mass'], hair_color=body['hair_color'], skin_color=body['skin_color'], eye_color=body['eye_color'], birth_year=body['birth_year'], gender=body['gender'], homeworld=body['homeworld'])
-    characters = People.query.all()
-    characters = list(map( lambda character: character.serialize(), characters))
-
-    # for i in range(len(characters)):
-    #     if(characters[i]['name']==new_character.serialize()['name']):
-    #         raise APIException("El personaje ya existe" , status_code=400)
-            
+    #homeworld_id a partir del nombre del planeta si no viene en el body
+    homeworld = resolve_homeworld_ids([{"homeworld": body['homeworld'], "homeworld_id": body.get('homeworld_id')}])[0]
+    new_character = People(name=body['name'], height=body['height'], mass=body['mass'], hair_color=body['hair_color'], skin_color=body['skin_color'], eye_color=body['eye_color'], birth_year=body['birth_year'], gender=body['gender'], homeworld=body['homeworld'], homeworld_id=homeworld['homeworld_id'])
     print(new_character)
     #print(new_user.serialize())
     db.session.add(new_character) 
+    bump_table_version(People.__tablename__)
     db.session.commit()
+    search_index.add(People.__tablename__, new_character.id, new_character.name)
     
     return jsonify({"mensaje": "Personaje creado exitosamente"}), 201
 
@@ -223,17 +675,16 @@ def create_new_planet():
         raise APIException("name es inválido" , status_code=400)
 
     new_planets = Planets(name=body['name'], diameter=body['diameter'], rotation_Period=body['rotation_Period'], orbital_Period=body['orbital_Period'], gravity=body['gravity'], population=body['population'], climate=body['climate'], terrain=body['terrain'], surface_Water=body['surface_Water'])
-    planets = Planets.query.all()
-    planets = list(map( lambda planet: planet.serialize(), planets))
+    #búsqueda por el índice único de name en vez de recorrer toda la tabla
+    if db.session.query(Planets.id).filter_by(name=body['name']).first() is not None:
+        raise APIException("El planeta ya existe" , status_code=409)
 
-    for i in range(len(planets)):
-        if(planets[i]['name']==new_planets.serialize()['name']):
-            raise APIException("El planeta ya existe" , status_code=400)
-            
     print(new_planets)
     #print(new_user.serialize())
     db.session.add(new_planets) 
+    bump_table_version(Planets.__tablename__)
     db.session.commit()
+    search_index.add(Planets.__tablename__, new_planets.id, new_planets.name)
     
     return jsonify({"mensaje": "Planeta creado exitosamente"}), 201
 
@@ -248,21 +699,69 @@ def create_new_vehicle():
         raise APIException("name es inválido" , status_code=400)
 
     new_vehicles = Vehicles(name=body['name'], model=body['model'], vehicle_class=body['vehicle_class'], manufacturer=body['manufacturer'], cost_in_credits=body['cost_in_credits'], length=body['length'], crew=body['crew'], passengers=body['passengers'], max_atmosphering_speed=body['max_atmosphering_speed'], cargo_capacity=body['cargo_capacity'], consumables=body['consumables'])
-    vehicles = Vehicles.query.all()
-    vehicles = list(map( lambda vehicle: vehicle.serialize(), vehicles))
+    #búsqueda por el índice único de name en vez de recorrer toda la tabla
+    if db.session.query(Vehicles.id).filter_by(name=body['name']).first() is not None:
+        raise APIException("El vehículo ya existe" , status_code=409)
 
-    for i in range(len(vehicles)):
-        if(vehicles[i]['name']==new_vehicles.serialize()['name']):
-            raise APIException("El vehículo ya existe" , status_code=400)
-            
     print(new_vehicles)
     db.session.add(new_vehicles) 
+    bump_table_version(Vehicles.__tablename__)
     db.session.commit()
+    search_index.add(Vehicles.__tablename__, new_vehicles.id, new_vehicles.name)
     
     return jsonify({"mensaje": "Vehículo creado exitosamente"}), 201
 
+#Funciones para carga masiva (arreglo JSON o NDJSON), todo en una sola transacción
+
+def bulk_chunk_size():
+    try:
+        chunk_size = int(request.args.get('chunk_size', os.environ.get('BULK_CHUNK_SIZE', 500)))
+    except ValueError:
+        raise APIException("chunk_size debe ser un número entero", status_code=400)
+    if chunk_size < 1:
+        raise APIException("chunk_size debe ser mayor a 0", status_code=400)
+    return min(chunk_size, 5000)
+
+def bulk_create(model, unique_column=None, prepare=None):
+    try:
+        result = bulk_insert(model, iter_bulk_rows(request), bulk_chunk_size(), unique_column, prepare)
+    except IntegrityError:
+        raise
+    except SQLAlchemyError as err:
+        #un lote que la BD rechaza (p.ej. DataError) se responde en JSON, sin insertar nada
+        db.session.rollback()
+        raise APIException("La base de datos rechazó el lote: %s" % getattr(err, "orig", err), status_code=400)
+    if result["created"] > 0:
+        bump_table_version(model.__tablename__)
+        #los inserts masivos no pasan por el ORM: se pide reconstruir la tabla en todos los workers
+        record_search_reset(model.__tablename__)
+    db.session.commit()
+    search_index.request_refresh()
+    status_code = 201 if result["created"] > 0 else 400
+    return jsonify(result), status_code
+
+@app.route('/people/bulk', methods=['POST'])
+def create_people_bulk():
+    return bulk_create(People, prepare=resolve_homeworld_ids)
+
+@app.route('/planet/bulk', methods=['POST'])
+def create_planets_bulk():
+    return bulk_create(Planets, unique_column="name")
+
+@app.route('/vehicle/bulk', methods=['POST'])
+def create_vehicles_bulk():
+    return bulk_create(Vehicles, unique_column="name")
+
 #Funciones para eliminar items de cada tabla (personajes, planetas, vehículos)
 
+#antes de borrar un planeta, los personajes que lo tenían como homeworld quedan con homeworld_id NULL
+def detach_residents(planet_id):
+    residents = [person_id for (person_id,) in db.session.query(People.id).filter_by(homeworld_id=planet_id)]
+    if len(residents) > 0:
+        People.query.filter(People.id.in_(residents)).update({People.homeworld_id: None}, synchronize_session=False)
+        bump_table_version(People.__tablename__)
+    return residents
+
 #Funcion delete para eliminar personajes individuales a la base de datos
 @app.route('/people/<int:item_id>', methods=['DELETE'])
 def delete_character_by_id(item_id):
@@ -272,7 +771,9 @@ def delete_character_by_id(item_id):
     if character == None:
         raise APIException("El personaje no existe", status_code=400)  
     db.session.delete(character)
+    bump_table_version(People.__tablename__)
     db.session.commit()
+    search_index.remove(People.__tablename__, item_id)
     return jsonify("personaje eliminado exitosamente"), 200
 
 #Funcion delete para eliminar planetas individuales a la base de datos
@@ -283,8 +784,11 @@ def delete_planet_by_id(item_id):
     planet = Planets.query.get(item_id)
     if planet == None:
         raise APIException("El planeta no existe", status_code=400)  
+    detach_residents(item_id)
     db.session.delete(planet)
+    bump_table_version(Planets.__tablename__)
     db.session.commit()
+    search_index.remove(Planets.__tablename__, item_id)
     return jsonify("planeta eliminado exitosamente"), 200
 
 #Funcion delete para eliminar vehículos individuales a la base de datos
@@ -296,7 +800,9 @@ def delete_vehicle_by_id(item_id):
     if vehicle == None:
         raise APIException("El vehículo no existe", status_code=400)  
     db.session.delete(vehicle)
+    bump_table_version(Vehicles.__tablename__)
     db.session.commit()
+    search_index.remove(Vehicles.__tablename__, item_id)
     return jsonify("vehículo eliminado exitosamente"), 200
 
 
@@ -311,7 +817,9 @@ def delete_favorite_character_by_id(item_id):
     if item == None:
         raise APIException("El personaje no existe", status_code=400)  
     db.session.delete(item)
+    bump_table_version(People.__tablename__)
     db.session.commit()
+    search_index.remove(People.__tablename__, item_id)
     return jsonify("Personaje eliminado exitosamente"), 200
 
 #Funcion delete para eliminar items de la lista de planetas favoritos
@@ -322,8 +830,11 @@ def delete_favorite_planet_by_id(item_id):
     item = Planets.query.get(item_id)
     if item == None:
         raise APIException("El planeta no existe", status_code=400)  
+    detach_residents(item_id)
     db.session.delete(item)
+    bump_table_version(Planets.__tablename__)
     db.session.commit()
+    search_index.remove(Planets.__tablename__, item_id)
     return jsonify("Planeta eliminado exitosamente"), 200
 
 #Funcion delete para eliminar items de la lista de planetas favoritos
@@ -335,7 +846,9 @@ def delete_favorite_vehicle_by_id(item_id):
     if item == None:
         raise APIException("El vehículo no existe", status_code=400)  
     db.session.delete(item)
+    bump_table_version(Vehicles.__tablename__)
     db.session.commit()
+    search_index.remove(Vehicles.__tablename__, item_id)
     return jsonify("Vehículo eliminado exitosamente"), 200
 
 
@@ -354,7 +867,9 @@ def put_people_by_id(people_id):
     #validamos si viene el campo name en el body o no (despues de hacer el request.get_json())
     if not body['name'] is None:
         person.name = body['name']
+    bump_table_version(People.__tablename__)
     db.session.commit()     
+    search_index.add(People.__tablename__, person.id, person.name)
     return jsonify(person.serialize()), 200
 
 
@@ -364,14 +879,75 @@ def busqueda_people():
     #validaciones
     if body is None:
         raise APIException("Body está vacío" , status_code=400)
-    if not body['name'] is None:    
-        found = People.query.filter(People.name==body['name']).all() #va a encontrar todas las coincidencias        
-        found = list(map( lambda item: item.serialize(), found))
-        print(found)
-    if found == None:
-        raise APIException("El personaje no existe", status_code=400)  
+    if body.get('name') is None or body['name']=="":
+        raise APIException("name es inválido" , status_code=400)
+    found = People.query.filter(People.name==body['name']).all() #va a encontrar todas las coincidencias (usa el índice de name)
+    found = list(map( lambda item: item.serialize(), found))
     return jsonify(found), 200
 
+#Función get para buscar por nombre (prefijo o aproximado) en personajes, planetas y vehículos
+#?q=texto, ?type=people|planets|vehicles (opcional), ?limit=10
+@app.route('/search', methods=['GET'])
+def search():
+    q = request.args.get('q', '').strip()
+    if q == "":
+        raise APIException("q es requerido", status_code=400)
+    tables = None
+    if request.args.get('type'):
+        tables = request.args.get('type').split(",")
+        for table in tables:
+            if table not in search_index.models:
+                raise APIException("type %s no existe" % table, status_code=400)
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        raise APIException("limit debe ser un número entero", status_code=400)
+    if not search_index.wait_ready(SEARCH_READY_TIMEOUT):
+        raise APIException("El índice de búsqueda se está construyendo", status_code=503, headers={"Retry-After": "1"})
+    return jsonify(search_index.search(q, limit, tables)), 200
+
+#Función get para exportar una tabla completa en streaming: /export/people?format=csv|ndjson&gzip=1
+@app.route('/export/<table>', methods=['GET'])
+def export_table(table):
+    if table not in EXPORT_TABLES:
+        raise APIException("No se puede exportar %s" % table, status_code=404)
+    #las tablas de favoritos tienen las filas de todos los usuarios: solo para administradores
+    if table.startswith("favorite_"):
+        verify_jwt_in_request()
+        if current_user.id not in admin_user_ids:
+            return jsonify({"message":"Operación no permitida"}), 403
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_MIMETYPES:
+        raise APIException("format debe ser csv o ndjson", status_code=400)
+    compress = request.args.get('gzip') in ('1', 'true')
+    filename = "%s.%s%s" % (table, fmt, ".gz" if compress else "")
+
+    def generate():
+        stats = {}
+        for chunk in export_rows(EXPORT_TABLES[table], fmt, batch_size=EXPORT_BATCH_SIZE, compress=compress, stats=stats):
+            yield chunk
+        #en WARNING para que quede en el log de producción; el último resultado también sale en /cache/stats
+        last_export.update(stats, table=table, format=fmt, gzip=compress)
+        app.logger.warning("export %s: %d filas en %.2f s (%.0f filas/s)", filename, stats["rows"], stats["seconds"], stats["rows_per_second"])
+
+    response = Response(stream_with_context(generate()), mimetype="application/gzip" if compress else EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = "attachment; filename=%s" % filename
+    return response
+
+#Comando para exportar una tabla sin pasar por HTTP: flask export people --format ndjson --gzip -o people.ndjson.gz
+@app.cli.command("export")
+@click.argument("table", type=click.Choice(sorted(EXPORT_TABLES)))
+@click.option("--format", "fmt", type=click.Choice(sorted(EXPORT_MIMETYPES)), default="csv")
+@click.option("--gzip", "compress", is_flag=True, help="comprimir la salida con gzip")
+@click.option("-o", "--output", type=click.File("wb"), default="-", help="archivo de salida (por defecto stdout)")
+@click.option("--batch-size", default=EXPORT_BATCH_SIZE, help="filas por lote del cursor")
+def export_command(table, fmt, compress, output, batch_size):
+    stats = {}
+    for chunk in export_rows(EXPORT_TABLES[table], fmt, batch_size=batch_size, compress=compress, stats=stats):
+        output.write(chunk)
+    output.flush()
+    click.echo("%d filas en %.2f s (%.0f filas/s)" % (stats["rows"], stats["seconds"], stats["rows_per_second"]), err=True)
+
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -379,13 +955,17 @@ def login():
     email = body['email']
     password = body['password']
 
+    #se limita antes de consultar la BD y de gastar tiempo en bcrypt
+    client_ip = request.access_route[-1] if TRUST_X_FORWARDED_FOR and request.access_route else request.remote_addr
+    login_throttle.check(email, client_ip)
+
     user = User.query.filter_by(email=email).first()
 
     if user is None:
         raise APIException("usuario no existe", status_code=401)
     
     #validamos el password si el usuario existe y si coincide con el de la BD
-    if not bcrypt.check_password_hash(user.password, password):
+    if not password_hasher.check(user.password, password):
         raise APIException("usuario o password no coinciden", status_code=401)
 
     access_token = create_access_token(identity= user.id)
@@ -396,17 +976,9 @@ def login():
 def hello_protected(): #definición de la función
     #claims = get_jwt()
     print("id del usuario:", get_jwt_identity()) #imprimiendo la identidad del usuario que es el id
-    user = User.query.get(get_jwt_identity()) #búsqueda del id del usuario en la BD
-
-    #get_jwt() regresa un diccionario, y una propiedad importante es jti
-    jti=get_jwt()["jti"] 
+    user = current_user #usuario resuelto por load_current_user (cache por worker)
 
-    tokenBlocked = TokenBlockedList.query.filter_by(token=jti).first()
-    #cuando hay coincidencia tokenBloked es instancia de la clase TokenBlockedList
-    #cuando No hay coincidencia tokenBlocked = None
-
-    if isinstance(tokenBlocked, TokenBlockedList):
-        return jsonify(msg="Acceso Denegado")
+    #los tokens bloqueados ya fueron rechazados por check_if_token_revoked antes de llegar aquí
 
     response_body={
         "message":"token válido",
@@ -423,29 +995,41 @@ def logout():
     print(get_jwt())
     jti=get_jwt()["jti"]
     now = datetime.now(timezone.utc)
+    #la fila solo sirve hasta que el token vence (exp), después la borra flask purge-blocklist
+    expires_at = datetime.utcfromtimestamp(get_jwt()["exp"]) if "exp" in get_jwt() else None
 
-    tokenBlocked = TokenBlockedList(token=jti, created_at=now)
-    db.session.add(tokenBlocked)
-    db.session.commit()
+    if write_queue is not None:
+        write_queue.enqueue(TokenBlockedList, {"token": jti, "created_at": now, "expires_at": expires_at}, key=("token_blocked_list", jti))
+    else:
+        tokenBlocked = TokenBlockedList(token=jti, created_at=now, expires_at=expires_at)
+        db.session.add(tokenBlocked)
+        db.session.commit()
+    revoked_tokens.add(jti)
 
     return jsonify({"message":"token bloqueado"})
 
 @app.route('/suspendido/<int:user_id>', methods=['PUT']) #endpoint
 @jwt_required()
 def user_suspended(user_id):
-    if get_jwt_identity() != 1:
+    if current_user.id not in admin_user_ids:
         return jsonify({"message":"Operación no permitida"}), 403
         
     user = User.query.get(user_id)
+    if user == None:
+        raise APIException("El usuario no existe", status_code=400)
    
     #validamos si viene el campo name en el body o no (despues de hacer el request.get_json())
     if user.is_active:
         user.is_active = False
+        bump_table_version(User.__tablename__)
         db.session.commit()   
+        user_version.invalidate()
         return jsonify({"message":"Usuario suspendido"}), 203
     else:
         user.is_active = True
+        bump_table_version(User.__tablename__)
         db.session.commit()   
+        user_version.invalidate()
         return jsonify({"message":"Usuario reactivado"}), 203
 
    
@@ -0,0 +1,123 @@
+import time
+import threading
+from bisect import bisect_left
+from flask import g, request, has_request_context, json
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Instrumentación por request: cantidad de queries y tiempo en la BD (eventos del engine de
+# SQLAlchemy), tiempo de codificación JSON (encoder de Flask), tiempo en serialize() de los
+# modelos (las llamadas envueltas con timed_serialize) y el resto como tiempo "app" (lógica de
+# la vista). Se envía en el header Server-Timing y se acumula en histogramas por endpoint que
+# se exponen en formato Prometheus en GET /metrics.
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self._lock:
+            series = self._series.get(endpoint)
+            if series is None:
+                series = self._series[endpoint] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.help_text), "# TYPE %s histogram" % self.name]
+        with self._lock:
+            for endpoint, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bucket, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append('%s_bucket{endpoint="%s",le="%s"} %d' % (self.name, endpoint, bucket, cumulative))
+                lines.append('%s_bucket{endpoint="%s",le="+Inf"} %d' % (self.name, endpoint, count))
+                lines.append('%s_sum{endpoint="%s"} %s' % (self.name, endpoint, repr(total)))
+                lines.append('%s_count{endpoint="%s"} %d' % (self.name, endpoint, count))
+        return "\n".join(lines)
+
+
+class TimedJSONEncoder(json.JSONEncoder):
+    def encode(self, o):
+        start = time.perf_counter()
+        try:
+            return json.JSONEncoder.encode(self, o)
+        finally:
+            if has_request_context() and "timing" in g:
+                g.timing["json"] += time.perf_counter() - start
+
+
+def timed_serialize(serialize):
+    #suma a g.timing["serialize"] el tiempo de cada llamada, sin las queries que dispare (relaciones lazy)
+    def wrapper(*args, **kwargs):
+        if not has_request_context() or "timing" not in g:
+            return serialize(*args, **kwargs)
+        timing = g.timing
+        start = time.perf_counter()
+        db_before = timing["db"]
+        try:
+            return serialize(*args, **kwargs)
+        finally:
+            timing["serialize"] += time.perf_counter() - start - (timing["db"] - db_before)
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "timing" in g:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "timing" in g and conn.info.get("query_start"):
+        g.timing["db"] += time.perf_counter() - conn.info["query_start"].pop()
+        g.timing["queries"] += 1
+
+
+class RequestMetrics:
+    def __init__(self, app=None):
+        self.request_duration = Histogram("http_request_duration_seconds", "Duración total del request", DURATION_BUCKETS)
+        self.db_duration = Histogram("http_request_db_seconds", "Tiempo en la base de datos por request", DURATION_BUCKETS)
+        self.json_duration = Histogram("http_request_json_seconds", "Tiempo de codificación JSON por request", DURATION_BUCKETS)
+        self.serialize_duration = Histogram("http_request_serialize_seconds", "Tiempo en serialize() de los modelos por request", DURATION_BUCKETS)
+        self.db_queries = Histogram("http_request_db_queries", "Cantidad de queries SQL por request", COUNT_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.json_encoder = TimedJSONEncoder
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g.timing = {"start": time.perf_counter(), "db": 0.0, "json": 0.0, "serialize": 0.0, "queries": 0}
+
+    def _finish(self, response):
+        timing = g.pop("timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing["start"]
+        endpoint = request.endpoint or "404"
+        response.headers.add("Server-Timing", 'db;dur=%.3f;desc="%d queries", ser;dur=%.3f, json;dur=%.3f, app;dur=%.3f, total;dur=%.3f' % (
+            timing["db"] * 1000, timing["queries"], timing["serialize"] * 1000, timing["json"] * 1000,
+            max(total - timing["db"] - timing["serialize"] - timing["json"], 0) * 1000, total * 1000))
+        self.request_duration.observe(endpoint, total)
+        self.db_duration.observe(endpoint, timing["db"])
+        self.json_duration.observe(endpoint, timing["json"])
+        self.serialize_duration.observe(endpoint, timing["serialize"])
+        self.db_queries.observe(endpoint, timing["queries"])
+        return response
+
+    def render(self):
+        histograms = [self.request_duration, self.db_duration, self.serialize_duration, self.json_duration, self.db_queries]
+        return "\n".join(histogram.render() for histogram in histograms) + "\n"
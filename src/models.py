@@ -1,5 +1,9 @@
-from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from routing import RoutingSQLAlchemy
+#igual que SQLAlchemy() pero puede mandar las lecturas de los GET a réplicas (ver routing.py)
+db = RoutingSQLAlchemy()
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -29,20 +33,29 @@ class User(db.Model):
 # Tabla Characters
 class People(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     height = db.Column(db.Float)
     mass = db.Column(db.Float)
     hair_color  = db.Column(db.String(250))
     skin_color  = db.Column(db.String(250))
-    eye_color  = db.Column(db.String(250))
-    birth_year = db.Column(db.Integer)
-    gender = db.Column(db.String(250))
+    eye_color  = db.Column(db.String(250), index=True)
+    birth_year = db.Column(db.Integer, index=True)
+    gender = db.Column(db.String(250), index=True)
     homeworld = db.Column(db.String(250))
+    #llave foránea al planeta, se llena a partir del nombre en homeworld
+    homeworld_id = db.Column(db.Integer, db.ForeignKey('planets.id', ondelete='SET NULL'), index=True)
+    homeworld_planet = db.relationship("Planets")
     people_favorite = db.relationship("Favorite_People", backref="people")
+    #contador desnormalizado de favoritos, se mantiene con los eventos de las tablas pivote (ver abajo)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
+    #columnas que se pueden usar como filtro/orden en GET /people (todas con índice)
+    filter_columns = ["gender", "eye_color", "birth_year", "homeworld_id"]
+    #relaciones que se pueden pedir con ?include= (se cargan con joinedload)
+    include_relations = {"homeworld": "homeworld_planet"}
 
 #Characters serialize
-    def serialize(self):
-        return {
+    def serialize(self, include=()):
+        data = {
             "id": self.id,
             "name": self.name,
             "height": self.height,
@@ -52,37 +65,48 @@ class People(db.Model):
             "eye_color": self.eye_color,
             "birth_year": self.birth_year,
             "gender": self.gender,
-            "homeworld": self.homeworld
+            "homeworld": self.homeworld,
+            "homeworld_id": self.homeworld_id
         }
+        if "homeworld" in include:
+            data["homeworld_planet"] = self.homeworld_planet.serialize() if self.homeworld_planet is not None else None
+        return data
 
 # Tabla Pivote: Characters/ Favorites
 class Favorite_People(db.Model):
+    #un usuario no puede tener el mismo favorito dos veces (dos POST a la vez pasaban el chequeo previo)
+    __table_args__ = (db.Index('ix_favorite__people_user_id_people_id', 'user_id', 'people_id', unique=True),)
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id')) #con el nombre de la tabla user y atributo id
-    people_id = db.Column(db.Integer, db.ForeignKey('people.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True) #con el nombre de la tabla user y atributo id
+    people_id = db.Column(db.Integer, db.ForeignKey('people.id'), index=True)
     #Esta es una tabla pivote para relacionar User y Characters, relación muchos a muchos
+    #serialize usa las relaciones (user, people), cargarlas con joinedload para evitar N+1
 
     def serialize(self):
         return {
             "id": self.id,
-            "user_email": User.query.get(self.user_id).serialize()['email'],
-            "character_name": People.query.get(self.people_id).serialize()['name']          
+            "user_email": self.user.email,
+            "character_name": self.people.name
         }
 
 
 # Tabla Planets
 class Planets (db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
     diameter = db.Column(db.Float)
     rotation_Period = db.Column(db.Float)
     orbital_Period = db.Column(db.Float)
     gravity = db.Column(db.String(100))
-    population = db.Column(db.Integer)
-    climate = db.Column(db.String(100))
-    terrain = db.Column(db.String(100))
+    population = db.Column(db.Integer, index=True)
+    climate = db.Column(db.String(100), index=True)
+    terrain = db.Column(db.String(100), index=True)
     surface_Water = db.Column(db.Integer)
     planets_favorite = db.relationship("Favorite_Planets", backref="planets")
+    #contador desnormalizado de favoritos, se mantiene con los eventos de las tablas pivote (ver abajo)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
+    #columnas que se pueden usar como filtro/orden en GET /planets (todas con índice)
+    filter_columns = ["climate", "terrain", "population"]
 
     #Planets serialize
     def serialize(self):
@@ -99,28 +123,40 @@ class Planets (db.Model):
             "surface_Water": self.surface_Water
         }
 
+#busca los ids de los planetas por nombre con una sola consulta IN (índice único de planets.name)
+def resolve_homeworld_ids(rows):
+    names = set(row.get("homeworld") for row in rows if row.get("homeworld") and row.get("homeworld_id") is None)
+    if len(names) == 0:
+        return rows
+    ids = dict(db.session.query(Planets.name, Planets.id).filter(Planets.name.in_(names)))
+    for row in rows:
+        if row.get("homeworld_id") is None:
+            row["homeworld_id"] = ids.get(row.get("homeworld"))
+    return rows
+
 # Tabla Pivote: Planets/ Favorites    
 #Esta es una tabla pivote para relacionar User y Planets, relación muchos a muchos
 class Favorite_Planets(db.Model):
+    __table_args__ = (db.Index('ix_favorite__planets_user_id_planet_id', 'user_id', 'planet_id', unique=True),)
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id')) #con el nombre de la tabla user y atributo id
-    planet_id = db.Column(db.Integer, db.ForeignKey('planets.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True) #con el nombre de la tabla user y atributo id
+    planet_id = db.Column(db.Integer, db.ForeignKey('planets.id'), index=True)
 
     #serialize
     def serialize(self):
         return {
             "id": self.id,
-            "user_email": User.query.get(self.user_id).serialize()['email'],
-            "planet_name": Planets.query.get(self.planet_id).serialize()['name'],
+            "user_email": self.user.email,
+            "planet_name": self.planets.name,
         }
 
 class Vehicles(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
     model = db.Column(db.String(250))
-    vehicle_class = db.Column(db.String(250))
-    manufacturer = db.Column(db.String(250))
-    cost_in_credits = db.Column(db.Integer)
+    vehicle_class = db.Column(db.String(250), index=True)
+    manufacturer = db.Column(db.String(250), index=True)
+    cost_in_credits = db.Column(db.Integer, index=True)
     length = db.Column(db.Float)
     crew = db.Column(db.Integer)
     passengers = db.Column(db.Integer)
@@ -128,6 +164,10 @@ class Vehicles(db.Model):
     cargo_capacity = db.Column(db.Float)
     consumables = db.Column(db.String(250))
     vehicles_favorite = db.relationship("Favorite_Vehicles", backref="vehicles")
+    #contador desnormalizado de favoritos, se mantiene con los eventos de las tablas pivote (ver abajo)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)
+    #columnas que se pueden usar como filtro/orden en GET /vehicles (todas con índice)
+    filter_columns = ["vehicle_class", "manufacturer", "cost_in_credits"]
 
     #serialize
     def serialize(self):
@@ -148,26 +188,151 @@ class Vehicles(db.Model):
 
 # Tabla Pivote: Vehicles/ Favorites
 class Favorite_Vehicles(db.Model):
+    __table_args__ = (db.Index('ix_favorite__vehicles_user_id_vehicle_id', 'user_id', 'vehicle_id', unique=True),)
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id')) #con el nombre de la tabla user y atributo id
-    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True) #con el nombre de la tabla user y atributo id
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), index=True)
     #Esta es una tabla pivote para relacionar User y Vehicles, relación muchos a muchos
 
     def serialize(self):
         return {
             "id": self.id,
-            "user_email": User.query.get(self.user_id).serialize()['email'],
-            "vehicle_name": Vehicles.query.get(self.vehicles_id).serialize()['name']       
+            "user_email": self.user.email,
+            "vehicle_name": self.vehicles.name
         }
 
 class TokenBlockedList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     token= db.Column(db.String(250), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False)
+    #vencimiento del token (claim exp, UTC); pasada esta fecha la fila se puede borrar
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
 
     def serialize(self):
         return {
             "id": self.id,
             "token": self.token,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at
+        }
+
+
+# Contador de versión por tabla: las escrituras lo incrementan en la misma transacción
+# y los GET lo usan para armar el ETag sin leer las filas de la tabla
+class TableVersion(db.Model):
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            "table_name": self.table_name,
+            "version": self.version
+        }
+
+def get_table_version(table_name, primary=False):
+    #primary=True lee siempre de la BD principal, aunque el request esté usando una réplica
+    if primary:
+        statement = db.select([TableVersion.version]).where(TableVersion.table_name == table_name)
+        return db.session.execute(statement, bind=db.get_engine()).scalar() or 0
+    version = db.session.query(TableVersion.version).filter_by(table_name=table_name).scalar()
+    return version or 0
+
+def bump_table_version(table_name):
+    updated = TableVersion.query.filter_by(table_name=table_name).update({TableVersion.version: TableVersion.version + 1}, synchronize_session=False)
+    if updated == 0:
+        db.session.add(TableVersion(table_name=table_name, version=1))
+
+
+# Registro de cambios en los nombres de people, planets y vehicles para el índice de búsqueda:
+# cada insert/delete/cambio de name agrega una fila en la misma transacción y los workers
+# aplican esas filas a su índice en memoria (ver search.py). item_id NULL pide reconstruir la
+# tabla completa (cargas masivas, que no tienen los ids de las filas nuevas).
+class SearchChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    item_id = db.Column(db.Integer, nullable=True)
+    #None cuando la fila se borró
+    name = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "table_name": self.table_name,
+            "item_id": self.item_id,
+            "name": self.name,
             "created_at": self.created_at
-        }
\ No newline at end of file
+        }
+
+def record_search_reset(table_name):
+    db.session.add(SearchChange(table_name=table_name))
+
+def _record_search_change(connection, model, item_id, name):
+    connection.execute(SearchChange.__table__.insert().values(table_name=model.__tablename__, item_id=item_id, name=name, created_at=datetime.utcnow()))
+
+def _register_search_log(model):
+    @event.listens_for(model, "after_insert")
+    def after_insert(mapper, connection, target):
+        _record_search_change(connection, model, target.id, target.name)
+
+    @event.listens_for(model, "after_delete")
+    def after_delete(mapper, connection, target):
+        _record_search_change(connection, model, target.id, None)
+
+    @event.listens_for(model, "after_update")
+    def after_update(mapper, connection, target):
+        if inspect(target).attrs.name.history.has_changes():
+            _record_search_change(connection, model, target.id, target.name)
+
+for model in (People, Planets, Vehicles):
+    _register_search_log(model)
+
+
+# Contadores de favoritos: cada insert/delete/update en una tabla pivote suma o resta en
+# favorite_count dentro de la misma transacción. Los cambios también se guardan en
+# session.info["favorite_deltas"] para actualizar el leaderboard en memoria después del commit.
+FAVORITE_TARGETS = [
+    (Favorite_People, "people_id", People),
+    (Favorite_Planets, "planet_id", Planets),
+    (Favorite_Vehicles, "vehicle_id", Vehicles)
+]
+
+def _change_favorite_count(connection, target, model, item_id, delta):
+    if item_id is None:
+        return
+    table = model.__table__
+    connection.execute(table.update().where(table.c.id == item_id).values(favorite_count=table.c.favorite_count + delta))
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("favorite_deltas", []).append((model.__tablename__, item_id, delta))
+
+def _register_favorite_counter(pivot, column, model):
+    @event.listens_for(pivot, "after_insert")
+    def after_insert(mapper, connection, target):
+        _change_favorite_count(connection, target, model, getattr(target, column), 1)
+
+    @event.listens_for(pivot, "after_delete")
+    def after_delete(mapper, connection, target):
+        item_id = inspect(target).attrs[column].history.deleted
+        _change_favorite_count(connection, target, model, item_id[0] if item_id else getattr(target, column), -1)
+
+    @event.listens_for(pivot, "after_update")
+    def after_update(mapper, connection, target):
+        history = inspect(target).attrs[column].history
+        if not history.has_changes():
+            return
+        for item_id in history.deleted:
+            _change_favorite_count(connection, target, model, item_id, -1)
+        for item_id in history.added:
+            _change_favorite_count(connection, target, model, item_id, 1)
+
+for pivot, column, model in FAVORITE_TARGETS:
+    _register_favorite_counter(pivot, column, model)
+
+def reconcile_favorite_counts():
+    #recalcula todos los contadores desde las tablas pivote
+    for pivot, column, model in FAVORITE_TARGETS:
+        table = model.__table__
+        pivot_table = pivot.__table__
+        count = db.select([db.func.count(pivot_table.c.id)]).where(pivot_table.c[column] == table.c.id).as_scalar()
+        db.session.execute(table.update().values(favorite_count=count))
@@ -0,0 +1,85 @@
+import os
+import re
+import time
+import traceback
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Detector de N+1 y queries lentas para desarrollo y CI (se activa con QUERY_INSPECTOR=1).
+# Guarda cada statement SQL del request con su duración y el lugar del código que lo generó;
+# al terminar el request avisa si una misma forma de query se repitió más de repeat_threshold
+# veces (patrón N+1) o si alguna superó slow_ms. En modo estricto lanza QueryProblem, así el
+# test client de Flask falla en lugar de dejar pasar la regresión.
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class QueryProblem(Exception):
+    pass
+
+def statement_shape(statement):
+    shape = " ".join(statement.split())
+    #IN (?, ?, ?) y IN (?) son la misma forma de query
+    return re.sub(r"\((\s*(\?|%\(\w+\)s|%s|:\w+)\s*,?)+\)", "(?)", shape)
+
+def call_site():
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if frame.filename.startswith(APP_ROOT) and not frame.filename.endswith("query_inspector.py"):
+            return "%s:%d in %s" % (os.path.basename(frame.filename), frame.lineno, frame.name)
+    return "desconocido"
+
+
+class QueryInspector:
+    def __init__(self, app=None, repeat_threshold=5, slow_ms=100, strict=False):
+        self.repeat_threshold = repeat_threshold
+        self.slow_ms = slow_ms
+        self.strict = strict
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.logger = app.logger
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "query_log" in g:
+            conn.info.setdefault("inspector_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "query_log" in g and conn.info.get("inspector_start"):
+            duration = time.perf_counter() - conn.info["inspector_start"].pop()
+            g.query_log.append((statement_shape(statement), duration * 1000, call_site()))
+
+    def _start(self):
+        g.query_log = []
+
+    def problems(self, query_log):
+        found = []
+        shapes = {}
+        for shape, duration_ms, site in query_log:
+            entry = shapes.setdefault(shape, [0, set()])
+            entry[0] += 1
+            entry[1].add(site)
+            if duration_ms > self.slow_ms:
+                found.append("query lenta (%.1f ms) en %s: %s" % (duration_ms, site, shape))
+        for shape, (count, sites) in shapes.items():
+            if count > self.repeat_threshold:
+                found.append("posible N+1: %d veces desde %s: %s" % (count, ", ".join(sorted(sites)), shape))
+        return found
+
+    def _finish(self, response):
+        query_log = g.pop("query_log", None)
+        if not query_log:
+            return response
+        found = self.problems(query_log)
+        if len(found) == 0:
+            return response
+        endpoint = "%s %s (%s)" % (request.method, request.path, request.endpoint)
+        for problem in found:
+            self.logger.warning("%s: %s", endpoint, problem)
+        if self.strict:
+            raise QueryProblem("%s: %s" % (endpoint, "; ".join(found)))
+        return response
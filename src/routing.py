@@ -0,0 +1,74 @@
+import time
+import itertools
+from flask import g, request, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import orm, event
+
+# Ruteo de lecturas a réplicas: los GET/HEAD leen de las réplicas (round-robin) y todo lo
+# demás va a la BD primaria. Se queda en la primaria:
+#  - cualquier escritura (flush) y el resto del request después de escribir
+#  - las tablas de autenticación (user, token_blocked_list), para que un bloqueo o una
+#    suspensión tenga efecto aunque la réplica vaya atrasada
+#  - los GET de un cliente que escribió hace menos de sticky_seconds (read-your-writes),
+#    marcado con la cookie read_primary_until o pedido con el header X-Read-Primary: 1
+# Las réplicas se configuran con DB_REPLICA_URLS (separadas por coma) como binds replica_N.
+# Cada request lee de una sola réplica (elegida al empezar): la versión de table_version y
+# las filas salen de la misma BD, así el ETag y la llave del cache de main.py corresponden a
+# los datos de esa réplica y nunca a una mezcla de réplicas con distinto atraso.
+
+PRIMARY_ONLY_TABLES = set(["user", "token_blocked_list"])
+STICKY_COOKIE = "read_primary_until"
+
+class RoutingSession(SignallingSession):
+    def _use_replica(self, mapper):
+        if mapper is None or self._flushing or self.info.get("wrote"):
+            return False
+        if self.new or self.dirty or self.deleted:
+            return False
+        if not has_request_context() or not g.get("use_replica"):
+            return False
+        return mapper.persist_selectable.name not in PRIMARY_ONLY_TABLES
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._use_replica(mapper):
+            return get_state(self.app).db.get_replica_engine(self.app)
+        return SignallingSession.get_bind(self, mapper, clause)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def init_app(self, app):
+        SQLAlchemy.init_app(self, app)
+        app.config.setdefault("SQLALCHEMY_REPLICA_BINDS", [])
+        app.config.setdefault("REPLICA_STICKY_SECONDS", 5)
+        self._replica_cycle = itertools.cycle(app.config["SQLALCHEMY_REPLICA_BINDS"])
+        if len(app.config["SQLALCHEMY_REPLICA_BINDS"]) > 0:
+            app.before_request(self._choose_bind)
+            app.after_request(self._stick_to_primary)
+
+    def get_replica_engine(self, app):
+        return self.get_engine(app, bind=g.replica_bind)
+
+    def _choose_bind(self):
+        if request.method not in ("GET", "HEAD") or request.headers.get("X-Read-Primary") == "1":
+            g.use_replica = False
+            return
+        try:
+            primary_until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0
+        g.use_replica = primary_until < time.time()
+        if g.use_replica:
+            g.replica_bind = next(self._replica_cycle)
+
+    def _stick_to_primary(self, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            sticky_seconds = self.get_app().config["REPLICA_STICKY_SECONDS"]
+            response.set_cookie(STICKY_COOKIE, str(time.time() + sticky_seconds), max_age=sticky_seconds, httponly=True)
+        return response
@@ -0,0 +1,216 @@
+import time
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from collections import defaultdict
+from models import db, SearchChange
+
+# Índice de búsqueda en memoria (por worker) sobre los nombres de people, planets y vehicles.
+# Cada palabra se indexa por trigramas con dos espacios al inicio ("  luke" -> "  l", " lu",
+# "luk", "uke"), así una consulta corta funciona como búsqueda por prefijo y una larga
+# tolera errores de tipeo.
+#
+# El índice se construye en un thread en segundo plano al iniciar el worker (post_worker_init
+# en gunicorn.conf.py, before_first_request con flask run), no dentro de una búsqueda. Las
+# escrituras de este worker lo actualizan de inmediato con add/remove; las de los otros workers
+# llegan por la tabla search_change (una fila por insert/delete/cambio de name, ver models.py),
+# que el mismo thread lee cada refresh_interval segundos desde el último id visto - rescan_window,
+# igual que el blocklist. Solo una carga masiva (fila con item_id NULL) reconstruye su tabla,
+# en ese thread y no en el request; varias cargas seguidas se juntan en una sola recarga.
+# Las filas con más de retention segundos se borran; un worker que lleva más que eso sin
+# refrescar reconstruye el índice completo.
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.lower().split())
+
+def trigrams(text, pad_end=True):
+    grams = set()
+    for word in text.split():
+        padded = "  " + word + (" " if pad_end else "")
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class SearchIndex:
+    def __init__(self, models, refresh_interval=30, rescan_window=1000, retention=3600):
+        self.models = dict((model.__tablename__, model) for model in models)
+        self.refresh_interval = refresh_interval
+        self.rescan_window = rescan_window
+        self.retention = retention
+        self.builds = 0
+        self.changes_applied = 0
+        self._names = {}
+        self._grams = defaultdict(set)
+        self._last_id = 0
+        #ids de search_change ya aplicados dentro de la ventana que se vuelve a leer
+        self._window_ids = set()
+        self._last_refresh = None
+        self._ready = threading.Event()
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _add(self, table, item_id, name, names=None, grams=None):
+        names = self._names if names is None else names
+        grams = self._grams if grams is None else grams
+        key = (table, item_id)
+        self._remove(table, item_id, names, grams)
+        normalized = normalize(name)
+        names[key] = (name, normalized)
+        for gram in trigrams(normalized):
+            grams[gram].add(key)
+
+    def _remove(self, table, item_id, names=None, grams=None):
+        names = self._names if names is None else names
+        grams = self._grams if grams is None else grams
+        key = (table, item_id)
+        previous = names.pop(key, None)
+        if previous is None:
+            return
+        for gram in trigrams(previous[1]):
+            keys = grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del grams[gram]
+
+    def _rows(self, table):
+        model = self.models[table]
+        return db.session.query(model.id, model.name).yield_per(1000)
+
+    def _build(self):
+        #índice completo armado fuera del lock y reemplazado de una vez; los cambios que hagan
+        #commit mientras se leen las tablas se vuelven a aplicar desde la ventana de search_change
+        last_id = db.session.query(db.func.max(SearchChange.id)).scalar() or 0
+        names = {}
+        grams = defaultdict(set)
+        for table in self.models:
+            for item_id, name in self._rows(table):
+                self._add(table, item_id, name, names, grams)
+        with self._lock:
+            self._names = names
+            self._grams = grams
+            self._last_id = last_id
+            self._window_ids = set()
+        self.builds += 1
+
+    def _reload_table(self, table):
+        rows = list(self._rows(table))
+        with self._lock:
+            for key in [key for key in self._names if key[0] == table]:
+                self._remove(*key)
+            for item_id, name in rows:
+                self._add(table, item_id, name)
+
+    def _apply_changes(self):
+        window_start = self._last_id - self.rescan_window
+        changes = db.session.query(SearchChange.id, SearchChange.table_name, SearchChange.item_id, SearchChange.name).filter(SearchChange.id > window_start).order_by(SearchChange.id).all()
+        reload_tables = set()
+        with self._lock:
+            for change_id, table, item_id, name in changes:
+                if change_id in self._window_ids or table not in self.models:
+                    continue
+                if item_id is None:
+                    reload_tables.add(table)
+                elif name is None:
+                    self._remove(table, item_id)
+                else:
+                    self._add(table, item_id, name)
+                self.changes_applied += 1
+                self._window_ids.add(change_id)
+                self._last_id = max(self._last_id, change_id)
+            window_start = self._last_id - self.rescan_window
+            self._window_ids = set(change_id for change_id in self._window_ids if change_id > window_start)
+        for table in reload_tables:
+            self._reload_table(table)
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        db.session.query(SearchChange).filter(SearchChange.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+
+    def refresh(self):
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._last_refresh is None or now - self._last_refresh >= self.retention:
+                self._build()
+            self._apply_changes()
+            self._last_refresh = now
+            self._ready.set()
+
+    def start(self, app):
+        #un thread por worker: se llama después del fork, nunca en el master de gunicorn
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(app,), name="search-index", daemon=True)
+        self._thread.start()
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    self.refresh()
+                    self._prune()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("no se pudo actualizar el índice de búsqueda")
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+    def request_refresh(self):
+        #adelanta la siguiente revisión del thread sin esperarla (p.ej. después de una carga masiva)
+        self._wake.set()
+
+    def add(self, table, item_id, name):
+        with self._lock:
+            self._add(table, item_id, name)
+
+    def remove(self, table, item_id):
+        with self._lock:
+            self._remove(table, item_id)
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def search(self, q, limit=10, tables=None):
+        query = normalize(q)
+        if query == "":
+            return []
+        with self._lock:
+            query_grams = trigrams(query, pad_end=False)
+            counts = defaultdict(int)
+            for gram in query_grams:
+                for key in self._grams.get(gram, ()):
+                    counts[key] += 1
+            results = []
+            for key, count in counts.items():
+                if tables is not None and key[0] not in tables:
+                    continue
+                score = count / len(query_grams)
+                if score < 0.5:
+                    continue
+                name, normalized = self._names[key]
+                if normalized == query:
+                    score += 2
+                elif normalized.startswith(query):
+                    score += 1
+                elif any(word.startswith(query) for word in normalized.split()):
+                    score += 0.5
+                results.append({"type": key[0], "id": key[1], "name": name, "score": round(score, 3)})
+        results.sort(key=lambda result: (-result["score"], result["name"]))
+        return results[:limit]
+
+    def stats(self):
+        return {
+            "documents": len(self._names),
+            "trigrams": len(self._grams),
+            "ready": self._ready.is_set(),
+            "builds": self.builds,
+            "changes_applied": self.changes_applied,
+            "last_change_id": self._last_id
+        }
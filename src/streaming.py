@@ -0,0 +1,21 @@
+from flask import Response, current_app, stream_with_context
+
+# Respuestas NDJSON (un objeto JSON por línea) generadas fila por fila.
+# yield_per trae las filas por lotes (y activa stream_results en los drivers que lo
+# soportan), así la memoria del worker no depende del tamaño de la tabla.
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def wants_stream(request):
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def stream_ndjson(query, serialize, batch_size=1000):
+    #un solo encoder de la app para todo el stream (json.dumps arma uno por fila), igual que export.py
+    encoder = current_app.json_encoder(ensure_ascii=False, separators=(",", ":"))
+
+    def generate():
+        for item in query.yield_per(batch_size):
+            yield encoder.encode(serialize(item)) + "\n"
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
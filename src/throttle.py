@@ -0,0 +1,76 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from utils import APIException
+
+# Límite de intentos de /login con token bucket, por email y por IP.
+# Se revisa antes de buscar al usuario y de llamar a bcrypt: un intento rechazado cuesta un
+# diccionario en memoria en lugar de una verificación de bcrypt completa.
+# El almacenamiento es por worker (MemoryBucketStore); cualquier objeto con
+# take(limits) -> segundos de espera (0 si se permite), donde limits es una lista de
+# (key, capacity, refill_per_second), puede reemplazarlo, p.ej. uno sobre Redis para
+# compartir los buckets entre workers. take saca un token de cada bucket solo si todos
+# tienen uno: un intento rechazado por la IP no gasta el bucket del email (ni al revés).
+
+class MemoryBucketStore:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, limits):
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            wait = 0
+            for key, capacity, refill_per_second in limits:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / refill_per_second)
+                buckets.append((key, tokens))
+            for key, tokens in buckets:
+                self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+                self._buckets.move_to_end(key)
+            #con muchas llaves distintas se descartan los buckets usados hace más tiempo
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def stats(self):
+        return {"backend": "memory", "keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+class LoginThrottle:
+    def __init__(self, store, email_burst=5, email_per_minute=5, ip_burst=20, ip_per_minute=20):
+        self.store = store
+        self.limits = {
+            "email": (email_burst, email_per_minute / 60.0),
+            "ip": (ip_burst, ip_per_minute / 60.0)
+        }
+        self.allowed = 0
+        #cada intento rechazado es una verificación de bcrypt que no se hizo
+        self.bcrypt_avoided = 0
+
+    def check(self, email, ip):
+        limits = []
+        for kind, value in (("email", email), ("ip", ip)):
+            if not value:
+                continue
+            capacity, refill_per_second = self.limits[kind]
+            limits.append(("login:%s:%s" % (kind, str(value).lower()), capacity, refill_per_second))
+        wait = self.store.take(limits)
+        if wait > 0:
+            self.bcrypt_avoided += 1
+            raise APIException("Demasiados intentos, intenta más tarde", status_code=429, headers={"Retry-After": str(int(math.ceil(wait)))})
+        self.allowed += 1
+
+    def stats(self):
+        stats = {
+            "allowed": self.allowed,
+            "bcrypt_avoided": self.bcrypt_avoided
+        }
+        if hasattr(self.store, "stats"):
+            stats["store"] = self.store.stats()
+        return stats
@@ -1,20 +1,77 @@
+import os
+import base64
+import binascii
 from flask import jsonify, url_for
 
+# tamaño máximo de página que el servidor acepta en la paginación por cursor
+PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 100))
+
 class APIException(Exception):
     status_code = 400
 
-    def __init__(self, message, status_code=None, payload=None):
+    def __init__(self, message, status_code=None, payload=None, headers=None):
         Exception.__init__(self)
         self.message = message
         if status_code is not None:
             self.status_code = status_code
         self.payload = payload
+        self.headers = headers
 
     def to_dict(self):
         rv = dict(self.payload or ())
         rv['message'] = self.message
         return rv
 
+def engine_options(database_uri):
+    # opciones del pool de SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS), una instancia por worker de gunicorn
+    options = {
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 280))
+    }
+    # sqlite usa un pool sin tamaño configurable
+    if database_uri is not None and not database_uri.startswith("sqlite"):
+        options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", 5))
+        options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+        options["pool_timeout"] = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    return options
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode("utf-8")).decode("utf-8").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + padding).decode("utf-8"))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise APIException("Cursor after es inválido", status_code=400)
+
+def wants_pagination(args):
+    return "limit" in args or "after" in args
+
+def paginate_query(query, model, args):
+    # paginación keyset sobre la llave primaria: WHERE id > after ORDER BY id LIMIT n
+    # el costo por página no depende del tamaño de la tabla
+    try:
+        limit = int(args.get("limit", PAGE_SIZE_MAX))
+    except ValueError:
+        raise APIException("limit debe ser un número entero", status_code=400)
+    if limit < 1:
+        raise APIException("limit debe ser mayor a 0", status_code=400)
+    limit = min(limit, PAGE_SIZE_MAX)
+
+    query = query.order_by(model.id)
+    after = args.get("after")
+    if after:
+        query = query.filter(model.id > decode_cursor(after))
+
+    # pedimos una fila extra para saber si hay otra página sin hacer COUNT(*)
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].id)
+    return items, next_cursor
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
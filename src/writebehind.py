@@ -0,0 +1,163 @@
+import atexit
+import threading
+from models import db
+from utils import APIException
+
+# Cola de escritura diferida (write-behind) para inserts pequeños y frecuentes: los bloqueos
+# de logout y los favoritos. En lugar de un commit por request, un thread (uno por worker)
+# junta las filas y las inserta en una sola transacción cada flush_ms milisegundos o cuando
+# hay max_rows pendientes.
+# Durabilidad (WRITE_BEHIND):
+#  - "group": el request espera a que su lote haga commit; la respuesta sale con la fila ya
+#    guardada y un error de la fila llega al request, pero muchos requests comparten un commit
+#  - "async": el request responde de inmediato; si el proceso muere se pierden las filas de
+#    la última ventana de flush_ms y los errores solo quedan en el log y en stats()
+# Mientras una fila está en la cola se puede consultar con is_pending(key), así un token
+# bloqueado cuenta como revocado aunque todavía no esté en la BD.
+# En "group" el request espera como máximo wait_seconds: si su fila sigue en la cola la saca
+# y la inserta él mismo; si el thread ya la está guardando responde 503 con Retry-After.
+
+class PendingWrite:
+    def __init__(self, model, values, key):
+        self.model = model
+        self.values = values
+        self.key = key
+        self.error = None
+        self.done = threading.Event()
+
+
+class WriteBehindQueue:
+    def __init__(self, app, flush_ms=20, max_rows=500, durability="group", wait_seconds=5):
+        self.app = app
+        self.flush_ms = flush_ms
+        self.max_rows = max_rows
+        self.durability = durability
+        self.wait_seconds = wait_seconds
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.last_error = None
+        self._pending = []
+        self._pending_keys = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def _start(self):
+        #el thread se crea en el primer enqueue, ya dentro del worker de gunicorn (después del fork)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, model, values, key=None):
+        write = PendingWrite(model, values, key)
+        with self._cond:
+            self._start()
+            self._pending.append(write)
+            if key is not None:
+                self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+            if len(self._pending) == 1 or len(self._pending) >= self.max_rows:
+                self._cond.notify()
+        if self.durability == "group":
+            if not write.done.wait(self.wait_seconds):
+                self._write_now(write)
+            if write.error is not None:
+                raise write.error
+        return write
+
+    def _write_now(self, write):
+        #el thread no alcanzó a guardar la fila a tiempo (BD lenta o thread trabado)
+        with self._cond:
+            self.timeouts += 1
+            queued = write in self._pending
+            if queued:
+                self._pending.remove(write)
+        if not queued:
+            #ya está en un lote en curso, no se puede insertar de nuevo sin duplicarla
+            raise APIException("Servidor ocupado, intenta de nuevo", status_code=503, headers={"Retry-After": "1"})
+        try:
+            self._commit([write])
+        finally:
+            self._release([write])
+
+    def is_pending(self, key):
+        with self._cond:
+            return key in self._pending_keys
+
+    def wait_for(self, key, timeout=None):
+        #guarda ya las filas en cola y espera también al lote que el thread tenga en curso
+        self.flush()
+        with self._cond:
+            if not self._cond.wait_for(lambda: key not in self._pending_keys, timeout=self.wait_seconds if timeout is None else timeout):
+                raise APIException("Servidor ocupado, intenta de nuevo", status_code=503, headers={"Retry-After": "1"})
+
+    def _take(self):
+        with self._cond:
+            batch = self._pending[:self.max_rows]
+            del self._pending[:self.max_rows]
+            return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                #se duerme hasta la primera fila y desde ahí espera flush_ms (o max_rows) para juntar el lote
+                self._cond.wait_for(lambda: len(self._pending) > 0)
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_rows, timeout=self.flush_ms / 1000.0)
+            self.flush()
+
+    def flush(self):
+        batch = self._take()
+        while len(batch) > 0:
+            with self.app.app_context():
+                try:
+                    self._commit(batch)
+                finally:
+                    db.session.remove()
+            self._release(batch)
+            batch = self._take()
+
+    def _commit(self, batch):
+        try:
+            db.session.add_all([write.model(**write.values) for write in batch])
+            db.session.commit()
+            self.batches += 1
+            self.flushed += len(batch)
+            return
+        except Exception:
+            db.session.rollback()
+        #el lote falló: se reintenta fila por fila para aislar las que tienen error
+        for write in batch:
+            try:
+                db.session.add(write.model(**write.values))
+                db.session.commit()
+                self.flushed += 1
+            except Exception as err:
+                db.session.rollback()
+                write.error = err
+                self.failures += 1
+                self.last_error = "%s: %s" % (write.model.__tablename__, err)
+                self.app.logger.error("write-behind: no se pudo insertar en %s %r: %s", write.model.__tablename__, write.values, err)
+        self.batches += 1
+
+    def _release(self, batch):
+        with self._cond:
+            for write in batch:
+                if write.key is not None:
+                    self._pending_keys[write.key] -= 1
+                    if self._pending_keys[write.key] == 0:
+                        del self._pending_keys[write.key]
+            self._cond.notify_all()
+        for write in batch:
+            write.done.set()
+
+    def stats(self):
+        return {
+            "durability": self.durability,
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "last_error": self.last_error
+        }
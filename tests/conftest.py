@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# La app lee la configuración del entorno al importar main.py: una BD SQLite temporal por sesión
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DB_CONNECTION_STRING"] = "sqlite:///" + DB_PATH
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-with-enough-length-for-hs256")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ.setdefault("BLOCKLIST_REFRESH_SECONDS", "3600")
+os.environ.pop("DB_REPLICA_URLS", None)
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+import main  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with main.app.app_context():
+        main.db.drop_all()
+        main.db.create_all()
+        # la BD se recrea y los ids de search_change vuelven a empezar: índice nuevo, ya construido
+        main.search_index = SearchIndex(list(main.search_index.models.values()))
+        main.search_index.refresh()
+    main.entity_cache.clear()
+    main.user_cache.clear()
+    main.user_version.invalidate()
+    yield main.app
+    with main.app.app_context():
+        main.db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        user = main.User(email="luke@example.com", password="x", is_active=True, description="jedi")
+        main.db.session.add(user)
+        main.db.session.commit()
+        token = create_access_token(identity=user.id)
+    return {"Authorization": "Bearer " + token}
+
+
+@pytest.fixture
+def count_queries(app):
+    # cuenta los statements SQL que se ejecutan dentro del bloque
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    class Counter:
+        def __init__(self):
+            self.count = 0
+
+        def __call__(self, *args):
+            self.count += 1
+
+    counter = Counter()
+    event.listen(Engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(Engine, "before_cursor_execute", counter)
@@ -0,0 +1,31 @@
+import main
+from admin_views import ScalableModelView
+
+
+def add_characters(app, count):
+    with app.app_context():
+        main.db.session.execute(main.People.__table__.insert(), [{"name": "Personaje %d" % i} for i in range(count)])
+        main.db.session.commit()
+
+
+def test_requested_page_size_is_capped_for_the_pager(app):
+    add_characters(app, 250)
+    view = ScalableModelView(main.People, main.db.session)
+    with app.test_request_context("/admin/people/?page_size=1000000"):
+        # index_view calcula num_pages con este valor
+        assert view._get_list_extra_args().page_size == view.max_page_size
+        count, rows = view.get_list(0, None, False, None, None, page_size=1000000)
+    assert count == 250
+    assert len(rows) == view.max_page_size
+
+
+def test_simple_list_pager_skips_the_count(app, count_queries):
+    add_characters(app, 30)
+    view = ScalableModelView(main.People, main.db.session)
+    view.simple_list_pager = True
+    with app.test_request_context("/admin/people/"):
+        before = count_queries.count
+        count, rows = view.get_list(0, None, False, None, None)
+    assert count is None
+    assert len(rows) == view.page_size
+    assert count_queries.count - before == 1
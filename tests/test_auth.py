@@ -0,0 +1,66 @@
+import threading
+import pytest
+import main
+from blocklist import RevokedTokenCache
+from hashing import PasswordHasher
+from throttle import MemoryBucketStore, LoginThrottle
+from utils import APIException
+
+
+def test_login_is_throttled_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(main, "login_throttle", LoginThrottle(MemoryBucketStore(), email_burst=2, email_per_minute=1))
+    for _ in range(2):
+        assert client.post("/login", json={"email": "vader@example.com", "password": "x"}).status_code == 401
+    response = client.post("/login", json={"email": "vader@example.com", "password": "x"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    #otro email no comparte el bucket
+    assert client.post("/login", json={"email": "yoda@example.com", "password": "x"}).status_code == 401
+    assert main.login_throttle.stats()["bcrypt_avoided"] == 1
+
+
+def test_logout_revokes_the_token(app, client, auth_headers):
+    assert client.get("/helloprotected", headers=auth_headers).status_code == 200
+    assert client.get("/logout", headers=auth_headers).status_code == 200
+    assert client.get("/helloprotected", headers=auth_headers).status_code == 401
+    # otro worker (cache vacío) lo ve bloqueado por la fila en token_blocked_list
+    with app.app_context():
+        jti = main.TokenBlockedList.query.one().token
+        assert RevokedTokenCache(refresh_interval=3600).is_revoked(jti)
+
+
+def test_password_pool_rejects_when_full():
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowBcrypt:
+        def check_password_hash(self, pw_hash, password):
+            started.set()
+            release.wait(5)
+            return True
+
+    hasher = PasswordHasher(SlowBcrypt(), max_workers=1, max_queue=0)
+    busy = threading.Thread(target=hasher.check, args=("hash", "x"))
+    busy.start()
+    started.wait(5)
+    try:
+        with pytest.raises(APIException) as error:
+            hasher.check("hash", "x")
+        assert error.value.status_code == 503
+        assert hasher.rejected == 1
+    finally:
+        release.set()
+        busy.join()
+
+
+def test_rejected_attempt_does_not_spend_the_other_bucket():
+    throttle = LoginThrottle(MemoryBucketStore(), email_burst=5, email_per_minute=1, ip_burst=1, ip_per_minute=1)
+    throttle.check("luke@example.com", "10.0.0.1")
+    #la IP ya no tiene intentos: los rechazos no gastan el bucket del email
+    for _ in range(10):
+        with pytest.raises(APIException):
+            throttle.check("luke@example.com", "10.0.0.1")
+    for i in range(4):
+        throttle.check("luke@example.com", "10.0.0.%d" % (i + 2))
+    with pytest.raises(APIException):
+        throttle.check("luke@example.com", "10.0.0.9")
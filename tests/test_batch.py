@@ -0,0 +1,32 @@
+import main
+
+
+def test_invalid_items_fail_alone(client):
+    response = client.post("/batch", json=[
+        {"path": "/planets", "headers": "x"},
+        {"path": "/planets", "method": 5},
+        {"path": "/planets", "method": "TRACE"},
+        {"path": "/planets", "headers": {"X-Test": 1}},
+        "no es un objeto",
+        {"path": "/planets"}
+    ])
+    assert response.status_code == 200
+    assert [result["status"] for result in response.get_json()] == [400, 400, 400, 400, 400, 200]
+
+
+def test_reads_after_a_write_go_to_the_primary(client, monkeypatch):
+    sent = []
+    test_request_context = main.app.test_request_context
+
+    def spy(*args, **kwargs):
+        sent.append(kwargs["headers"].get("X-Read-Primary"))
+        return test_request_context(*args, **kwargs)
+
+    monkeypatch.setattr(main.app, "test_request_context", spy)
+    response = client.post("/batch", json=[
+        {"path": "/planets"},
+        {"path": "/planet/bulk", "method": "POST", "body": [{"name": "Hoth"}]},
+        {"path": "/planets"}
+    ])
+    assert [result["status"] for result in response.get_json()] == [200, 201, 200]
+    assert sent == [None, None, "1"]
@@ -0,0 +1,26 @@
+def test_bulk_reports_invalid_values_per_row(client):
+    response = client.post("/vehicle/bulk", json=[
+        {"name": "X-wing", "cost_in_credits": 149999},
+        {"name": ["x"]},
+        {"name": "TIE", "cost_in_credits": {"a": 1}},
+        {"name": "Speeder", "length": "3.4"}
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["created"] == 2
+    assert [result["status"] for result in body["results"]] == ["created", "error", "error", "created"]
+    assert "cost_in_credits" in body["results"][2]["message"]
+
+
+def test_bulk_reports_duplicates_and_too_long_values(client):
+    client.post("/vehicle/bulk", json=[{"name": "X-wing"}])
+    response = client.post("/vehicle/bulk", json=[{"name": "X-wing"}, {"name": "TIE", "model": "x" * 1000}, {"name": "Speeder"}])
+    body = response.get_json()
+    assert response.status_code == 201
+    assert [result["status"] for result in body["results"]] == ["error", "error", "created"]
+
+
+def test_bulk_rejects_non_list_body(client):
+    response = client.post("/planet/bulk", json={"name": "Hoth"})
+    assert response.status_code == 400
+    assert response.is_json
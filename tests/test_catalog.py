@@ -0,0 +1,43 @@
+import main
+
+
+def add_catalog(client):
+    client.post("/planet/bulk", json=[{"name": "Tatooine"}, {"name": "Alderaan"}])
+    client.post("/people/bulk", json=[{"name": "Luke", "homeworld": "Tatooine"}, {"name": "Leia", "homeworld": "Alderaan"}, {"name": "Han"}])
+
+
+def test_keyset_pagination_walks_the_table(client):
+    add_catalog(client)
+    first = client.get("/people?limit=2").get_json()
+    assert [item["name"] for item in first["results"]] == ["Luke", "Leia"]
+    second = client.get("/people?limit=2&after=" + first["next"]).get_json()
+    assert [item["name"] for item in second["results"]] == ["Han"]
+    assert second["next"] is None
+    assert client.get("/people?limit=0").status_code == 400
+
+
+def test_entity_cache_is_invalidated_by_a_write(client, count_queries):
+    add_catalog(client)
+    assert client.get("/people/1").get_json()["name"] == "Luke"
+    before = count_queries.count
+    client.get("/people/1")
+    #solo la versión de la tabla, la fila sale del cache
+    assert count_queries.count - before == 1
+    assert client.put("/people/1", json={"name": "Luke Skywalker"}).status_code == 200
+    assert client.get("/people/1").get_json()["name"] == "Luke Skywalker"
+
+
+def test_include_homeworld_resolves_the_planet(client, count_queries):
+    add_catalog(client)
+    before = count_queries.count
+    people = client.get("/people?include=homeworld").get_json()
+    queries = count_queries.count - before
+    assert [person["homeworld_planet"] and person["homeworld_planet"]["name"] for person in people] == ["Tatooine", "Alderaan", None]
+    assert client.get("/people/2?include=homeworld").get_json()["homeworld_planet"]["name"] == "Alderaan"
+    assert client.get("/people?include=films").status_code == 400
+
+    #más personajes no agregan queries (un solo SELECT con JOIN)
+    client.post("/people/bulk", json=[{"name": "Extra %d" % i, "homeworld": "Tatooine"} for i in range(20)])
+    before = count_queries.count
+    assert len(client.get("/people?include=homeworld").get_json()) == 23
+    assert count_queries.count - before == queries
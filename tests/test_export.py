@@ -0,0 +1,22 @@
+import main
+
+
+def test_export_streams_rows_and_records_throughput(client):
+    client.post("/vehicle/bulk", json=[{"name": "X-wing"}, {"name": "TIE"}])
+    response = client.get("/export/vehicles?format=ndjson")
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 2
+    stats = client.get("/cache/stats").get_json()["export"]
+    assert stats["table"] == "vehicles"
+    assert stats["rows"] == 2
+
+
+def test_export_of_favorites_requires_an_admin_token(client, auth_headers):
+    assert client.get("/export/favorite_people").status_code == 401
+    main.admin_user_ids.discard(1)
+    try:
+        assert client.get("/export/favorite_people", headers=auth_headers).status_code == 403
+    finally:
+        main.admin_user_ids.add(1)
+    assert client.get("/export/favorite_people", headers=auth_headers).status_code == 200
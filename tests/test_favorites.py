@@ -0,0 +1,73 @@
+import main
+
+
+def add_favorites(client, headers, count):
+    client.post("/people/bulk", json=[{"name": "Personaje %d" % i} for i in range(count)])
+    client.post("/planet/bulk", json=[{"name": "Planeta %d" % i} for i in range(count)])
+    client.post("/vehicle/bulk", json=[{"name": "Vehículo %d" % i} for i in range(count)])
+    with main.app.app_context():
+        for i in range(1, count + 1):
+            main.db.session.add(main.Favorite_People(user_id=1, people_id=i))
+            main.db.session.add(main.Favorite_Planets(user_id=1, planet_id=i))
+            main.db.session.add(main.Favorite_Vehicles(user_id=1, vehicle_id=i))
+        main.db.session.commit()
+
+
+def favorites_queries(client, headers, count_queries):
+    # primer request para calentar el cache de usuario y el de tokens bloqueados
+    client.get("/user/favorites", headers=headers)
+    before = count_queries.count
+    response = client.get("/user/favorites", headers=headers)
+    assert response.status_code == 200
+    return count_queries.count - before, response.get_json()
+
+
+def test_favorites_query_count_is_constant(client, auth_headers, count_queries):
+    add_favorites(client, auth_headers, 3)
+    few_queries, body = favorites_queries(client, auth_headers, count_queries)
+    assert len(body) == 9
+
+    #más favoritos para el mismo usuario: la cantidad de queries no debe cambiar
+    with main.app.app_context():
+        for i in range(4, 41):
+            main.db.session.add(main.People(name="Extra %d" % i))
+        main.db.session.commit()
+        for i in range(4, 41):
+            main.db.session.add(main.Favorite_People(user_id=1, people_id=i))
+        main.db.session.commit()
+    many_queries, body = favorites_queries(client, auth_headers, count_queries)
+    assert len(body) == 46
+    assert many_queries == few_queries
+
+
+def test_favorites_only_lists_the_token_user(client, auth_headers):
+    add_favorites(client, auth_headers, 2)
+    with main.app.app_context():
+        main.db.session.add(main.User(email="leia@example.com", password="x", is_active=True, description="general"))
+        main.db.session.add(main.Favorite_People(user_id=2, people_id=1))
+        main.db.session.commit()
+    body = client.get("/user/favorites", headers=auth_headers).get_json()
+    assert all(item["user_email"] == "luke@example.com" for item in body)
+
+
+def test_remove_favorite_deletes_only_the_token_users_pivot_row(client, auth_headers):
+    add_favorites(client, auth_headers, 2)
+    with main.app.app_context():
+        main.db.session.add(main.User(email="leia@example.com", password="x", is_active=True, description="general"))
+        main.db.session.add(main.Favorite_People(user_id=2, people_id=1))
+        main.db.session.commit()
+
+    assert client.delete("/user/favorites/people/1", headers=auth_headers).status_code == 200
+    assert client.delete("/user/favorites/people/1", headers=auth_headers).status_code == 404
+    assert client.delete("/user/favorites/people/1").status_code == 401
+
+    body = client.get("/user/favorites", headers=auth_headers).get_json()
+    assert len(body) == 5
+    with main.app.app_context():
+        # el personaje y el favorito del otro usuario siguen ahí
+        assert main.People.query.get(1).favorite_count == 1
+        assert main.Favorite_People.query.filter_by(user_id=2, people_id=1).count() == 1
+
+
+def test_favorite_count_is_not_a_selectable_field(client):
+    assert client.get("/people?fields=name,favorite_count").status_code == 400
@@ -0,0 +1,45 @@
+import itertools
+import main
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def test_json_and_ndjson_lists_are_not_confused(client):
+    client.post("/planet/bulk", json=[{"name": "Hoth"}, {"name": "Dagobah"}])
+    as_json = client.get("/planets")
+    as_ndjson = client.get("/planets", headers=NDJSON)
+    as_ndjson.get_data()
+    assert as_json.mimetype == "application/json"
+    assert as_ndjson.mimetype == "application/x-ndjson"
+    assert "Accept" in as_json.headers["Vary"]
+    assert "Accept" in as_ndjson.headers["Vary"]
+    # el stream lee las filas después de los headers: no lleva ETag
+    assert "ETag" in as_json.headers
+    assert "ETag" not in as_ndjson.headers
+
+    # el ETag del JSON no valida la versión NDJSON
+    response = client.get("/planets", headers=dict(NDJSON, **{"If-None-Match": as_json.headers["ETag"]}))
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    response.get_data()
+
+
+def test_uncached_lists_are_tagged_only_if_the_version_did_not_move(client, monkeypatch):
+    client.post("/planet/bulk", json=[{"name": "Hoth"}])
+    assert "ETag" in client.get("/planets?fields=name").headers
+
+    # una escritura entre la lectura de la versión y la de las filas
+    versions = itertools.count(100)
+    monkeypatch.setattr(main, "entity_version", lambda model: next(versions))
+    for path in ("/planets?fields=name", "/planets?limit=1", "/people?include=homeworld", "/people?gender=x"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+
+def test_stream_rejects_pagination(client):
+    client.post("/planet/bulk", json=[{"name": "Hoth"}, {"name": "Dagobah"}, {"name": "Endor"}])
+    assert client.get("/planets?stream=1&limit=2").status_code == 400
+    assert client.get("/planets?after=1", headers=NDJSON).status_code == 400
+    response = client.get("/planets?stream=1")
+    assert len(response.get_data(as_text=True).splitlines()) == 3
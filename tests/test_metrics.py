@@ -0,0 +1,15 @@
+def server_timing(response):
+    return dict(entry.split(";")[0:2] for entry in response.headers["Server-Timing"].replace(" ", "").split(","))
+
+
+def test_serialize_time_is_reported_apart_from_app_time(client):
+    client.post("/planet/bulk", json=[{"name": "Hoth"}, {"name": "Dagobah"}])
+    for path in ("/planets", "/planet/1", "/planets?fields=name"):
+        timing = server_timing(client.get(path))
+        assert set(timing) == {"db", "ser", "json", "app", "total"}
+        assert float(timing["ser"].split("=")[1]) > 0
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    # los histogramas son del proceso (se acumulan entre tests): solo se revisa que existan
+    assert 'http_request_serialize_seconds_count{endpoint="get_planets"}' in metrics
+    assert 'http_request_serialize_seconds_count{endpoint="get_planet_by_id"}' in metrics
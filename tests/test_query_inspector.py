@@ -0,0 +1,32 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from query_inspector import QueryInspector, QueryProblem
+
+
+@pytest.fixture
+def inspected_app():
+    # app aparte: el inspector escucha a todos los Engine y se quita al terminar
+    app = Flask(__name__)
+    app.testing = True
+    engine = create_engine("sqlite://")
+    inspector = QueryInspector(app, repeat_threshold=3, slow_ms=1000, strict=True)
+
+    @app.route("/rows/<int:n>")
+    def rows(n):
+        #una query por fila, como un serialize que recorre una relación sin joinedload
+        for i in range(n):
+            engine.execute("SELECT ?", i).scalar()
+        return "ok"
+
+    yield app
+    event.remove(Engine, "before_cursor_execute", inspector._before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", inspector._after_cursor_execute)
+
+
+def test_strict_mode_fails_a_request_with_n_plus_one(inspected_app):
+    client = inspected_app.test_client()
+    assert client.get("/rows/3").status_code == 200
+    with pytest.raises(QueryProblem, match="posible N\\+1: 4 veces"):
+        client.get("/rows/4")
@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+from flask import Flask, jsonify
+from routing import RoutingSQLAlchemy, STICKY_COOKIE
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    # app aparte con una primaria y una réplica; cada BD tiene una fila distinta para saber de dónde se leyó
+    primary, replica = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    for path, name in ((primary, "primaria"), (replica, "replica")):
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.execute("INSERT INTO item (name) VALUES (?)", (name,))
+            conn.execute("INSERT INTO user (name) VALUES (?)", (name,))
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + primary
+    app.config["SQLALCHEMY_BINDS"] = {"replica_0": "sqlite:///" + replica}
+    app.config["SQLALCHEMY_REPLICA_BINDS"] = ["replica_0"]
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db = RoutingSQLAlchemy(app)
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String)
+
+    class User(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String)
+
+    @app.route("/item", methods=["GET", "POST"])
+    def item():
+        return jsonify({"item": Item.query.first().name, "user": User.query.first().name})
+
+    return app
+
+
+def test_reads_go_to_the_replica_except_auth_tables(routed_app):
+    body = routed_app.test_client().get("/item").get_json()
+    assert body == {"item": "replica", "user": "primaria"}
+
+
+def test_primary_is_used_after_a_write_or_when_asked(routed_app):
+    client = routed_app.test_client()
+    assert client.get("/item", headers={"X-Read-Primary": "1"}).get_json()["item"] == "primaria"
+    response = client.post("/item")
+    assert response.get_json()["item"] == "primaria"
+    #el POST deja la cookie read-your-writes: el siguiente GET del cliente lee de la primaria
+    assert STICKY_COOKIE in response.headers["Set-Cookie"]
+    assert client.get("/item").get_json()["item"] == "primaria"
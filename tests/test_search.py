@@ -0,0 +1,60 @@
+import main
+from search import SearchIndex
+
+PERSON = {"name": "Luke Skywalker", "height": "172", "mass": "77", "hair_color": "blond", "skin_color": "fair", "eye_color": "blue", "birth_year": "19BBY", "gender": "male", "homeworld": "Tatooine"}
+
+
+def other_worker(app):
+    # otro worker con su propio índice, sincronizado solo por la tabla search_change
+    index = SearchIndex([main.People, main.Planets, main.Vehicles])
+    with app.app_context():
+        index.refresh()
+    return index
+
+
+def refresh(app, index):
+    with app.app_context():
+        index.refresh()
+
+
+def names(index, q):
+    return [result["name"] for result in index.search(q)]
+
+
+def test_writes_reach_other_workers_as_deltas(app, client):
+    index = other_worker(app)
+    assert index.search("luke") == []
+
+    client.post("/people", json=PERSON)
+    refresh(app, index)
+    assert names(index, "luke") == ["Luke Skywalker"]
+
+    person_id = index.search("luke")[0]["id"]
+    client.put("/people/%d" % person_id, json={"name": "Anakin Skywalker"})
+    refresh(app, index)
+    assert names(index, "luke") == []
+    assert names(index, "anakin") == ["Anakin Skywalker"]
+
+    client.delete("/people/%d" % person_id)
+    refresh(app, index)
+    assert names(index, "anakin") == []
+    assert index.builds == 1
+
+
+def test_bulk_insert_reloads_only_its_table(app, client):
+    index = other_worker(app)
+    client.post("/planet/bulk", json=[{"name": "Hoth"}, {"name": "Dagobah"}])
+    refresh(app, index)
+    assert names(index, "hoth") == ["Hoth"]
+    assert index.builds == 1
+
+
+def test_search_endpoint_uses_the_background_index(app, client):
+    client.post("/vehicle/bulk", json=[{"name": "X-wing"}])
+    # el request de la carga no recarga el índice, solo despierta al thread
+    assert main.search_index.search("x-wing") == []
+    # lo que hace el thread del índice al recibir request_refresh()
+    refresh(app, main.search_index)
+    response = client.get("/search?q=x-wing")
+    assert response.status_code == 200
+    assert [result["name"] for result in response.get_json()] == ["X-wing"]
@@ -0,0 +1,55 @@
+import os
+import sys
+import json
+import subprocess
+from tests.conftest import SRC
+
+# Tiempo de arranque de un worker: import de main.py y primer request, en un proceso nuevo
+# (los límites se pueden ajustar con STARTUP_IMPORT_BUDGET y STARTUP_FIRST_RESPONSE_BUDGET)
+IMPORT_BUDGET = float(os.environ.get("STARTUP_IMPORT_BUDGET", 1.5))
+FIRST_RESPONSE_BUDGET = float(os.environ.get("STARTUP_FIRST_RESPONSE_BUDGET", 0.5))
+
+STARTUP_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = {name: name in sys.modules for name in ("flask_admin", "flask_migrate", "alembic", "flask_swagger")}
+response = main.app.test_client().get("/")
+first_response = time.perf_counter()
+admin_status = main.app.test_client().get("/admin/").status_code
+print(json.dumps({
+    "import": imported - start,
+    "first_response": first_response - imported,
+    "status": response.status_code,
+    "loaded": loaded,
+    "admin_status": admin_status,
+    "admin_loaded": "flask_admin" in sys.modules
+}))
+"""
+
+
+def run_startup(tmp_path):
+    env = dict(os.environ)
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    env.pop("FLASK_ENV", None)
+    env.pop("FLASK_DEBUG", None)
+    env["DB_CONNECTION_STRING"] = "sqlite:///" + str(tmp_path / "startup.db")
+    env["ADMIN_MOUNT"] = "lazy"
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", STARTUP_SCRIPT], cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_defers_heavy_imports(tmp_path):
+    startup = run_startup(tmp_path)
+    assert startup["loaded"] == {"flask_admin": False, "flask_migrate": False, "alembic": False, "flask_swagger": False}
+    #el admin se monta en el primer /admin
+    assert startup["admin_status"] == 200
+    assert startup["admin_loaded"] is True
+
+
+def test_startup_time_budget(tmp_path):
+    startup = run_startup(tmp_path)
+    assert startup["status"] == 200
+    assert startup["import"] < IMPORT_BUDGET, "import de main.py tardó %.3f s" % startup["import"]
+    assert startup["first_response"] < FIRST_RESPONSE_BUDGET, "primer request tardó %.3f s" % startup["first_response"]
@@ -0,0 +1,47 @@
+from flask_jwt_extended import create_access_token
+import main
+
+
+def test_suspension_by_another_worker_is_seen_immediately(app, client):
+    with app.app_context():
+        user = main.User(email="leia@example.com", password="x", is_active=True, description="princesa")
+        main.db.session.add(user)
+        main.db.session.commit()
+        user_id = user.id
+        headers = {"Authorization": "Bearer " + create_access_token(identity=user_id)}
+    assert client.get("/user/favorites", headers=headers).status_code == 200
+
+    # otro worker suspende al usuario: este worker no borra nada de su cache y lo ve
+    # en la siguiente revisión de la versión (cada USER_VERSION_CHECK_SECONDS)
+    with app.app_context():
+        main.User.query.get(user_id).is_active = False
+        main.bump_table_version("user")
+        main.db.session.commit()
+    main.user_version.invalidate()
+    assert client.get("/user/favorites", headers=headers).status_code == 401
+
+
+def test_cached_user_costs_no_queries(app, client, auth_headers):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    client.get("/user/favorites", headers=auth_headers)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/user/favorites", headers=auth_headers).status_code == 200
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+    assert not any("table_version" in statement or "FROM user" in statement for statement in statements)
+
+
+def test_suspend_endpoint_revokes_access(app, client, auth_headers):
+    with app.app_context():
+        user = main.User(email="han@example.com", password="x", is_active=True, description="piloto")
+        main.db.session.add(user)
+        main.db.session.commit()
+        user_id = user.id
+        headers = {"Authorization": "Bearer " + create_access_token(identity=user_id)}
+    assert client.get("/user/favorites", headers=headers).status_code == 200
+    assert client.put("/suspendido/%d" % user_id, headers=auth_headers).status_code == 203
+    assert client.get("/user/favorites", headers=headers).status_code == 401
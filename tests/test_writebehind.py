@@ -0,0 +1,87 @@
+import threading
+import time
+import pytest
+from sqlalchemy.exc import IntegrityError
+import main
+from writebehind import WriteBehindQueue
+
+
+def stalled_queue(app, monkeypatch, **kwargs):
+    # sin thread de flush: simula un flusher trabado
+    queue = WriteBehindQueue(app, **kwargs)
+    monkeypatch.setattr(queue, "_start", lambda: None)
+    return queue
+
+
+def add_character(app):
+    with app.app_context():
+        main.db.session.add(main.People(name="Luke"))
+        main.db.session.commit()
+
+
+def test_group_write_falls_back_to_a_synchronous_insert(app, auth_headers, monkeypatch):
+    add_character(app)
+    queue = stalled_queue(app, monkeypatch, durability="group", wait_seconds=0.05)
+    key = ("favorite__people", 1, 1)
+    with app.app_context():
+        queue.enqueue(main.Favorite_People, {"user_id": 1, "people_id": 1}, key=key)
+        assert main.Favorite_People.query.filter_by(user_id=1, people_id=1).count() == 1
+    assert not queue.is_pending(key)
+    assert queue.stats()["timeouts"] == 1
+
+
+def test_wait_for_covers_the_batch_already_taken_by_the_thread(app, auth_headers, monkeypatch):
+    add_character(app)
+    queue = stalled_queue(app, monkeypatch, durability="async")
+    key = ("favorite__people", 1, 1)
+    queue.enqueue(main.Favorite_People, {"user_id": 1, "people_id": 1}, key=key)
+    batch = queue._take()
+
+    def slow_flush():
+        time.sleep(0.1)
+        with app.app_context():
+            queue._commit(batch)
+            main.db.session.remove()
+        queue._release(batch)
+
+    flusher = threading.Thread(target=slow_flush)
+    flusher.start()
+    # la cola está vacía pero la fila sigue en camino: wait_for espera al lote en curso
+    queue.wait_for(key, timeout=5)
+    flusher.join()
+    with app.app_context():
+        assert main.Favorite_People.query.filter_by(user_id=1, people_id=1).count() == 1
+
+
+def test_duplicate_favorite_is_rejected(app, auth_headers):
+    add_character(app)
+    with app.app_context():
+        main.db.session.add(main.Favorite_People(user_id=1, people_id=1))
+        main.db.session.commit()
+        main.db.session.add(main.Favorite_People(user_id=1, people_id=1))
+        with pytest.raises(IntegrityError):
+            main.db.session.commit()
+        main.db.session.rollback()
+
+
+def test_queued_favorite_is_flushed_and_can_be_removed_before_the_flush(app, client, auth_headers, monkeypatch):
+    add_character(app)
+    with app.app_context():
+        main.db.session.add(main.People(name="Leia"))
+        main.db.session.commit()
+    monkeypatch.setattr(main, "write_queue", stalled_queue(app, monkeypatch, durability="async"))
+
+    assert client.post("/favorites/people/1", headers=auth_headers).status_code == 201
+    assert client.post("/favorites/people/2", headers=auth_headers).status_code == 201
+    #todavía en la cola: un segundo POST igual ya cuenta como duplicado
+    assert client.post("/favorites/people/1", headers=auth_headers).status_code == 409
+    with app.app_context():
+        assert main.Favorite_People.query.count() == 0
+
+    #quitar un favorito en cola primero lo guarda y después lo borra
+    assert client.delete("/user/favorites/people/2", headers=auth_headers).status_code == 200
+    main.write_queue.flush()
+    with app.app_context():
+        assert [(row.user_id, row.people_id) for row in main.Favorite_People.query.all()] == [(1, 1)]
+        assert main.People.query.get(1).favorite_count == 1
+    assert main.write_queue.stats()["flushed"] == 2